@@ -7,6 +7,7 @@ import secrets
 import uuid
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
 from django.db import models
 from django.urls import reverse
@@ -293,6 +294,27 @@ class WhitelistedDevice(models.Model):
         self.save()
 
 
+def whitelist_cache_key(user_id):
+    return f"whitelisted_user_agents:{user_id}"
+
+
+def get_whitelisted_user_agents(user_id):
+    """
+    User agents of a user's active devices.
+    Cached for a minute; accounts.signals clears it whenever a device changes.
+    """
+    key = whitelist_cache_key(user_id)
+    user_agents = cache.get(key)
+    if user_agents is None:
+        user_agents = frozenset(
+            WhitelistedDevice.objects.filter(
+                user_id=user_id, is_active=True
+            ).values_list("user_agent", flat=True)
+        )
+        cache.set(key, user_agents, 60)
+    return user_agents
+
+
 class DeviceAccessAttempt(models.Model):
     """
     Logs all device access attempts (successful and blocked).
@@ -1,14 +1,21 @@
 from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.signals import (
     user_logged_in,
     user_logged_out,
     user_login_failed,
 )
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from accounts.models_device import WhitelistedDevice, whitelist_cache_key
+
 try:
     from settings_manager.models import get_setting
 except Exception:
@@ -61,8 +68,6 @@ def on_user_logged_in(sender, request, user, **kwargs):
 
     # Enforce single-session policy if enabled
     try:
-        from django.contrib.sessions.models import Session
-
         enforce_single = str(
             get_setting("SECURITY_SINGLE_SESSION_ENFORCED", "True")
         ).lower() in ("1", "true", "yes")
@@ -107,3 +112,16 @@ def on_user_login_failed(sender, credentials, request, **kwargs):
 def on_user_logged_out(sender, request, user, **kwargs):
     # Nothing heavy for now; placeholder if we want to track
     return
+
+
+@receiver(post_save, sender=WhitelistedDevice)
+@receiver(post_delete, sender=WhitelistedDevice)
+def clear_whitelist_cache(sender, instance, **kwargs):
+    """Clear the cached device whitelist when a user's devices change"""
+    cache.delete(whitelist_cache_key(instance.user_id))
+
+
+@receiver(post_delete, sender=Session)
+def clear_session_cache(sender, instance, **kwargs):
+    """Evict a terminated session from the cached_db session cache"""
+    caches[settings.SESSION_CACHE_ALIAS].delete(KEY_PREFIX + instance.session_key)
@@ -1,4 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -40,3 +43,19 @@ class Phase4LoginTests(TestCase):
         login = self.client.login(username="treasury", password="pass123")
         response = self.client.get(reverse("role_redirect"))
         self.assertRedirects(response, "/dashboard/")
+
+
+class SessionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_deleted_session_is_evicted_from_cache(self):
+        session = SessionStore()
+        session["_auth_user_id"] = "1"
+        session.create()
+        key = session.session_key
+        self.assertEqual(SessionStore(key).load()["_auth_user_id"], "1")
+
+        # Terminating a session deletes its row, as the session views do
+        Session.objects.filter(session_key=key).delete()
+        self.assertEqual(SessionStore(key).load(), {})
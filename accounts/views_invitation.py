@@ -22,81 +22,15 @@ from accounts.models_device import (
     UserInvitation,
     WhitelistedDevice,
 )
+from pettycash_system.device_auth_middleware import (
+    get_client_ip,
+    get_device_info,
+    get_location,
+)
 from settings_manager.models import get_setting
 from settings_manager.views import log_activity
 
 
-def get_device_info(request):
-    """Extract device information from request"""
-    user_agent = request.META.get("HTTP_USER_AGENT", "")
-
-    # Parse device name from user agent
-    device_name = "Unknown Device"
-    if "Windows" in user_agent:
-        if "Windows NT 10" in user_agent or "Windows NT 11" in user_agent:
-            device_name = "Windows 10/11"
-        elif "Windows NT 6" in user_agent:
-            device_name = "Windows 7/8"
-        else:
-            device_name = "Windows"
-    elif "Macintosh" in user_agent or "Mac OS X" in user_agent:
-        device_name = "macOS"
-    elif "Linux" in user_agent:
-        device_name = "Linux"
-    elif "Android" in user_agent:
-        device_name = "Android"
-    elif "iPhone" in user_agent or "iPad" in user_agent:
-        device_name = "iOS"
-
-    # Add browser info
-    if "Chrome" in user_agent and "Edg" not in user_agent:
-        device_name += " - Chrome"
-    elif "Edg" in user_agent:
-        device_name += " - Edge"
-    elif "Firefox" in user_agent:
-        device_name += " - Firefox"
-    elif "Safari" in user_agent and "Chrome" not in user_agent:
-        device_name += " - Safari"
-
-    return {"device_name": device_name, "user_agent": user_agent}
-
-
-def get_client_ip(request):
-    """Extract client IP from request"""
-    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(",")[0].strip()
-    else:
-        ip = request.META.get("REMOTE_ADDR")
-    return ip
-
-
-def get_location(ip_address):
-    """Get location from IP address using geolocation API"""
-    enable_geolocation = get_setting("ENABLE_ACTIVITY_GEOLOCATION", "true")
-
-    if enable_geolocation != "true":
-        return ""
-
-    try:
-        import requests
-
-        response = requests.get(f"http://ip-api.com/json/{ip_address}", timeout=2)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("status") == "success":
-                city = data.get("city", "")
-                region = data.get("regionName", "")
-                country = data.get("country", "")
-                return (
-                    f"{city}, {region}, {country}" if city else f"{region}, {country}"
-                )
-    except:
-        pass
-
-    return ""
-
-
 @login_required
 @permission_required("accounts.add_user", raise_exception=True)
 def send_invitation(request):
@@ -1,74 +1,24 @@
 """
 Local test settings using SQLite for fast testing without PostgreSQL.
+
+Overlays the project settings rather than copying them, so apps and
+middleware cannot drift from what production runs.
 """
 
 import os
-from pathlib import Path
 
-# Build paths inside the project
-BASE_DIR = Path(__file__).resolve().parent
+os.environ.setdefault("DATABASE_URL", "sqlite://:memory:")
+os.environ.setdefault("DEBUG", "True")
+
+from pettycash_system.settings import *  # noqa: E402,F401,F403
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = "test-secret-key-for-local-testing-only"
 
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
 ALLOWED_HOSTS = ["*"]
 
-# Application definition
-INSTALLED_APPS = [
-    "django.contrib.admin",
-    "django.contrib.auth",
-    "django.contrib.contenttypes",
-    "django.contrib.sessions",
-    "django.contrib.messages",
-    "django.contrib.staticfiles",
-    # Third-party apps
-    "rest_framework",
-    "django_filters",
-    "crispy_forms",
-    "crispy_bootstrap5",
-    # Local apps
-    "accounts.apps.AccountsConfig",
-    "organization.apps.OrganizationConfig",
-    "workflow.apps.WorkflowConfig",
-    "transactions.apps.TransactionsConfig",
-    "treasury.apps.TreasuryConfig",
-    "reports.apps.ReportsConfig",
-    # Notifications app for email testing
-    "notifications.apps.NotificationsConfig",
-]
-
-MIDDLEWARE = [
-    "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-]
-
-ROOT_URLCONF = "pettycash_system.urls"
-
-TEMPLATES = [
-    {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
-        "OPTIONS": {
-            "context_processors": [
-                "django.template.context_processors.debug",
-                "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = "pettycash_system.wsgi.application"
+# Notifications app for email testing
+INSTALLED_APPS = INSTALLED_APPS + ["notifications.apps.NotificationsConfig"]
 
 # Database - SQLite for local testing
 DATABASES = {
@@ -78,64 +28,6 @@ DATABASES = {
     }
 }
 
-# Password validation
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
-    },
-    {
-        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
-    },
-]
-
-# Internationalization
-LANGUAGE_CODE = "en-us"
-TIME_ZONE = "UTC"
-USE_I18N = True
-USE_TZ = True
-
-# Static files (CSS, JavaScript, Images)
-STATIC_URL = "/static/"
-STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_DIRS = [BASE_DIR / "static"]
-
-# Default primary key field type
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
-
-# Custom User Model
-AUTH_USER_MODEL = "accounts.User"
-
-# Django Crispy Forms
-CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5"
-
-# Login URLs
-LOGIN_URL = "/accounts/login/"
-LOGIN_REDIRECT_URL = "/"
-LOGOUT_REDIRECT_URL = "/accounts/login/"
-
-# REST Framework
-REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.SessionAuthentication",
-    ],
-    "DEFAULT_PERMISSION_CLASSES": [
-        "rest_framework.permissions.IsAuthenticated",
-    ],
-    "DEFAULT_FILTER_BACKENDS": [
-        "django_filters.rest_framework.DjangoFilterBackend",
-    ],
-}
-
-# Test Runner
-TEST_RUNNER = "django.test.runner.DiscoverRunner"
-
 # Email settings for tests (use locmem so emails are captured in `django.core.mail.outbox`)
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 DEFAULT_FROM_EMAIL = "test-no-reply@example.com"
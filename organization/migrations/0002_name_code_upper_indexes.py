@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:37
+
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Trigram GIN indexes serving the UPPER(...) LIKE '%...%' predicates Django
+# emits for __icontains on PostgreSQL (manage_positions search).
+TRIGRAM_INDEXES = [
+    ("position_title_trgm_idx", "organization_position", "title"),
+    ("department_name_trgm_idx", "organization_department", "name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create trigram indexes on PostgreSQL only; SQLite has no GIN support."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" '
+            f'USING gin (UPPER("{column}") gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organization", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="branch",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"),
+                name="branch_name_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="branch",
+            index=models.Index(
+                django.db.models.functions.text.Upper("code"),
+                name="branch_code_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"),
+                name="company_name_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                django.db.models.functions.text.Upper("code"),
+                name="company_code_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="department",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"),
+                name="department_name_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="region",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"),
+                name="region_name_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="region",
+            index=models.Index(
+                django.db.models.functions.text.Upper("code"),
+                name="region_code_upper_idx",
+            ),
+        ),
+        # No-op on non-PostgreSQL backends.
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
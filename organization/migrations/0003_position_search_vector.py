@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_vector_index(apps, schema_editor):
+    """Create the GIN index and backfill vectors on PostgreSQL only"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "position_search_vector_idx" '
+        'ON "organization_position" USING gin ("search_vector")'
+    )
+    schema_editor.execute("""
+        UPDATE organization_position AS p
+        SET search_vector = to_tsvector(
+            COALESCE(p.title, '') || ' ' || COALESCE(d.name, '')
+        )
+        FROM organization_department AS d
+        WHERE d.id = p.department_id
+        """)
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "position_search_vector_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organization", "0002_name_code_upper_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="position",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            # GIN indexes only exist on PostgreSQL; SQLite keeps the state only
+            database_operations=[
+                migrations.RunPython(
+                    create_search_vector_index, drop_search_vector_index
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="position",
+                    index=django.contrib.postgres.indexes.GinIndex(
+                        fields=["search_vector"], name="position_search_vector_idx"
+                    ),
+                ),
+            ],
+        ),
+    ]
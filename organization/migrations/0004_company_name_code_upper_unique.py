@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:55
+
+from collections import defaultdict
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# The constraints below compare values ignoring case. Existing rows that
+# differ only in case would make them fail partway through a deploy, so they
+# are listed up front instead.
+CASE_INSENSITIVE_UNIQUE = [("Company", "name"), ("Company", "code")]
+
+
+def check_case_duplicates(apps, schema_editor):
+    """Fail with the clashing rows listed, before any constraint is added."""
+    clashes = []
+    for model_name, field in CASE_INSENSITIVE_UNIQUE:
+        model = apps.get_model("organization", model_name)
+        groups = defaultdict(list)
+        rows = model.objects.annotate(upper_value=Upper(field)).order_by("pk")
+        for upper_value, pk, value in rows.values_list("upper_value", "pk", field):
+            groups[upper_value].append(f"{value!r} (id {pk})")
+        clashes += [
+            f"{model_name}.{field}: {', '.join(values)}"
+            for values in groups.values()
+            if len(values) > 1
+        ]
+    if clashes:
+        raise RuntimeError(
+            "These rows differ only in letter case; rename or merge them before "
+            "applying this migration:\n" + "\n".join(clashes)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organization", "0003_position_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="company",
+            name="company_name_upper_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="company",
+            name="company_code_upper_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="company",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Upper("name"),
+                name="company_name_upper_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="company",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Upper("code"),
+                name="company_code_upper_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:19
+
+from collections import defaultdict
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# Existing rows that differ only in case would break the constraints below;
+# list them up front (see 0004).
+CASE_INSENSITIVE_UNIQUE = [
+    ("Branch", "name"),
+    ("Branch", "code"),
+    ("Region", "code"),
+]
+
+
+def check_case_duplicates(apps, schema_editor):
+    """Fail with the clashing rows listed, before any constraint is added."""
+    clashes = []
+    for model_name, field in CASE_INSENSITIVE_UNIQUE:
+        model = apps.get_model("organization", model_name)
+        groups = defaultdict(list)
+        rows = model.objects.annotate(upper_value=Upper(field)).order_by("pk")
+        for upper_value, pk, value in rows.values_list("upper_value", "pk", field):
+            groups[upper_value].append(f"{value!r} (id {pk})")
+        clashes += [
+            f"{model_name}.{field}: {', '.join(values)}"
+            for values in groups.values()
+            if len(values) > 1
+        ]
+    if clashes:
+        raise RuntimeError(
+            "These rows differ only in letter case; rename or merge them before "
+            "applying this migration:\n" + "\n".join(clashes)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organization", "0004_company_name_code_upper_unique"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="branch",
+            name="branch_name_upper_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="branch",
+            name="branch_code_upper_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="region",
+            name="region_code_upper_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="branch",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Upper("name"),
+                name="branch_name_upper_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="branch",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Upper("code"),
+                name="branch_code_upper_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="region",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Upper("code"),
+                name="region_code_upper_uniq",
+            ),
+        ),
+    ]
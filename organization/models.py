@@ -1,10 +1,23 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Upper
 
 
 class Company(models.Model):
     name = models.CharField(max_length=200, unique=True)
     code = models.CharField(max_length=10, unique=True)
 
+    class Meta:
+        # Case-insensitive uniqueness enforced by the database, so bulk imports
+        # can insert with ON CONFLICT DO NOTHING instead of pre-checking rows.
+        # The UPPER(...) unique indexes also serve __iexact lookups.
+        constraints = [
+            models.UniqueConstraint(Upper("name"), name="company_name_upper_uniq"),
+            models.UniqueConstraint(Upper("code"), name="company_code_upper_uniq"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -16,6 +29,15 @@ class Region(models.Model):
         Company, on_delete=models.CASCADE, related_name="regions"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(Upper("name"), name="region_name_upper_idx"),
+        ]
+        # Case-insensitive uniqueness, as for Company
+        constraints = [
+            models.UniqueConstraint(Upper("code"), name="region_code_upper_uniq"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -28,6 +50,13 @@ class Branch(models.Model):
         Region, on_delete=models.CASCADE, related_name="branches"
     )
 
+    class Meta:
+        # Case-insensitive uniqueness, as for Company
+        constraints = [
+            models.UniqueConstraint(Upper("name"), name="branch_name_upper_uniq"),
+            models.UniqueConstraint(Upper("code"), name="branch_code_upper_uniq"),
+        ]
+
     def __init__(self, *args, **kwargs):
         # Accept legacy 'company' kwarg used in tests without adding a DB field
         # This makes model creation calls like Branch.objects.create(name=..., company=company, region=region)
@@ -45,6 +74,11 @@ class Department(models.Model):
         Branch, on_delete=models.CASCADE, related_name="departments"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(Upper("name"), name="department_name_upper_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -59,11 +93,36 @@ class CostCenter(models.Model):
         return self.name
 
 
+class PositionQuerySet(models.QuerySet):
+    def refresh_search_vectors(self):
+        """
+        Recompute search_vector for these positions in a single UPDATE, reading
+        the department name in SQL. bulk_create() and update() skip post_save,
+        so call this after bulk writes. No-op outside PostgreSQL.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return 0
+        department_name = Subquery(
+            Department.objects.filter(pk=OuterRef("department_id")).values("name")[:1]
+        )
+        return self.update(search_vector=SearchVector("title", department_name))
+
+
 class Position(models.Model):
     title = models.CharField(max_length=100)
     department = models.ForeignKey(
         Department, on_delete=models.CASCADE, related_name="positions"
     )
+    # Full-text vector over title + department name, maintained by signals
+    # (PostgreSQL only; stays NULL on other backends).
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PositionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="position_search_vector_idx"),
+        ]
 
     def __str__(self):
         return self.title
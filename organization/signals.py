@@ -0,0 +1,23 @@
+"""
+Signals for organization app
+Keep Position.search_vector in sync with title and department name
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Department, Position
+
+
+@receiver(post_save, sender=Position)
+def update_position_search_vector(sender, instance, **kwargs):
+    """Refresh the search vector when a position is saved"""
+    Position.objects.filter(pk=instance.pk).refresh_search_vectors()
+
+
+@receiver(post_save, sender=Department)
+def update_department_positions_search_vector(sender, instance, created, **kwargs):
+    """Refresh positions' search vectors when their department is renamed"""
+    if created:
+        return
+    Position.objects.filter(department=instance).refresh_search_vectors()
@@ -1,3 +1,464 @@
+"""
+Tests for organization bulk import views
+"""
+
+import io
+from unittest import mock, skipUnless
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.contrib.postgres.search import SearchQuery
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from organization import views_bulk_import
+from organization.models import Branch, Company, Department, Position, Region
+from organization.views_admin import position_search_query
+from organization.views_bulk_import import COPY_MIN_ROWS, bulk_insert
+
+User = get_user_model()
+
+
+class BulkImportTemplateTests(TestCase):
+    """Test CSV template downloads"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme Ltd", code="ACME")
+        self.region = Region.objects.create(
+            name="Coast", code="CST", company=self.company
+        )
+        self.branch = Branch.objects.create(
+            name="Mombasa", code="MSA", region=self.region
+        )
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test123", email="admin@test.com", role="admin"
+        )
+        self.client.force_login(self.admin)
+
+    def get_csv(self, url_name, **params):
+        response = self.client.get(reverse(f"organization:{url_name}"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_companies_template_is_a_workbook(self):
+        response = self.client.get(reverse("organization:download_companies_template"))
+        self.assertIn(
+            'filename="companies_import_template.xlsx"',
+            response["Content-Disposition"],
+        )
+        content = b"".join(response.streaming_content)
+        wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True)
+        rows = list(wb["Companies"].iter_rows(values_only=True))
+        self.assertEqual(rows[:2], [("name", "code"), ("DemoCo", "DEMO")])
+
+    def test_import_page_counts_and_dropdowns(self):
+        Department.objects.create(name="Finance", branch=self.branch)
+        Department.objects.create(name="Operations", branch=self.branch)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("organization:import_organizations"))
+        org_queries = [q for q in ctx.captured_queries if "organization_" in q["sql"]]
+        self.assertEqual(len(org_queries), 4)  # counts + three dropdown lists
+        self.assertEqual(response.context["departments_count"], 2)
+        self.assertEqual(response.context["regions_count"], 1)
+        self.assertContains(response, "Mombasa (Coast)")
+
+    def test_regions_template_lists_companies(self):
+        content = self.get_csv("download_regions_template")
+        self.assertTrue(content.startswith("name,code,company_name"))
+        self.assertIn("ACMEDR,Acme Ltd", content)
+        self.assertIn("- Acme Ltd (ACME)", content)
+
+    def test_branches_template_filtered_by_company(self):
+        content = self.get_csv("download_branches_template", company=self.company.id)
+        self.assertIn("DemoBranch,CSTDB,+254700000000,Coast,Acme Ltd", content)
+        self.assertIn("- Coast (Acme Ltd)", content)
+
+    def test_filtered_template_filename(self):
+        response = self.client.get(
+            reverse("organization:download_departments_template"),
+            {"region": self.region.id},
+        )
+        self.assertIn(
+            'filename="departments_Coast_template.csv"',
+            response["Content-Disposition"],
+        )
+
+    def test_departments_template_lists_branches(self):
+        content = self.get_csv("download_departments_template")
+        self.assertIn("DemoDepartment,Mombasa", content)
+        self.assertIn("- Mombasa (Coast, Acme Ltd)", content)
+
+
+class BulkImportTests(TestCase):
+    """Test CSV bulk imports"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme Ltd", code="ACME")
+        self.region = Region.objects.create(
+            name="Coast", code="CST", company=self.company
+        )
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test123", email="admin@test.com", role="admin"
+        )
+        self.client.force_login(self.admin)
+
+    def upload(self, url_name, content, filename="import.csv"):
+        csv_file = SimpleUploadedFile(
+            filename, content.encode("utf-8"), content_type="text/csv"
+        )
+        response = self.client.post(
+            reverse(f"organization:{url_name}"), {"csv_file": csv_file}
+        )
+        self.assertRedirects(
+            response,
+            reverse("organization:import_organizations"),
+            fetch_redirect_response=False,
+        )
+        # Row errors arrive as one message, a line per row
+        return [
+            line
+            for message in get_messages(response.wsgi_request)
+            for line in str(message).splitlines()
+        ]
+
+    def test_import_companies_from_csv(self):
+        self.upload(
+            "import_companies",
+            "name,code\nBeta Corp,007\nAcme Ltd,ACX\n\nINSTRUCTIONS:\n",
+        )
+        self.assertTrue(Company.objects.filter(name="Beta Corp", code="007").exists())
+        self.assertEqual(Company.objects.count(), 2)
+
+    def test_import_companies_rejects_case_insensitive_duplicates(self):
+        messages_list = self.upload(
+            "import_companies",
+            "name,code\nacme ltd,NEW\nGamma,acme\nDelta,DLT\ndelta,DL2\n",
+        )
+        self.assertEqual(
+            sorted(Company.objects.values_list("name", flat=True)),
+            ["Acme Ltd", "Delta"],
+        )
+        self.assertIn("Row 2: Company 'acme ltd' already exists", messages_list)
+        self.assertIn("Row 3: Code 'acme' already exists", messages_list)
+        self.assertIn("Row 5: Company 'delta' already exists", messages_list)
+
+    def test_import_reports_malformed_rows(self):
+        messages_list = self.upload(
+            "import_companies",
+            "name,code\nBeta,BT,extra\n\nGamma,GM\nGamma Two,gm\nDelta\n"
+            "INSTRUCTIONS:\n- name: Company name\nZeta,ZT\n",
+        )
+        self.assertIn("⚠️ 3 row(s) failed", messages_list)
+        self.assertIn("Row 2: Expected 2 columns, found 3", messages_list)
+        # Numbering continues correctly past skipped and blank lines
+        self.assertIn("Row 5: Code 'gm' already exists", messages_list)
+        self.assertIn("Row 6: Expected 2 columns, found 1", messages_list)
+        # Nothing after the INSTRUCTIONS row is imported or reported
+        self.assertEqual(
+            sorted(Company.objects.values_list("name", flat=True)),
+            ["Acme Ltd", "Gamma"],
+        )
+
+    def test_import_numbers_rows_after_multiline_cells(self):
+        messages_list = self.upload(
+            "import_companies",
+            'name,code\n"Beta\nHoldings",BT\nGamma,acme\n'
+            '"Delta\n\nGroup"\nEpsilon,Acme\n',
+        )
+        self.assertIn("Row 4: Code 'acme' already exists", messages_list)
+        self.assertIn("Row 5: Expected 2 columns, found 1", messages_list)
+        self.assertIn("Row 8: Code 'Acme' already exists", messages_list)
+        self.assertTrue(Company.objects.filter(name="Beta\nHoldings").exists())
+
+    def test_import_without_name_column_is_rejected(self):
+        messages_list = self.upload("import_regions", "title,code\nWest,WST\n")
+        self.assertEqual(
+            messages_list, ["Error processing CSV: The file has no 'name' column"]
+        )
+
+    def test_import_lists_the_first_row_errors_in_file_order(self):
+        rows = "".join(f"Company {i},\n" for i in range(12))
+        messages_list = self.upload(
+            "import_companies", "name,code\nBeta Corp,acme\n" + rows
+        )
+        self.assertIn("⚠️ 13 row(s) failed", messages_list)
+        errors = messages_list[messages_list.index("⚠️ 13 row(s) failed") + 1 :]
+        # The database rejection of row 2 is found last but listed first
+        self.assertEqual(errors[0], "Row 2: Code 'acme' already exists")
+        self.assertEqual(errors[9], "Row 11: Missing name or code")
+        self.assertEqual(errors[10:], ["...and 3 more"])
+
+    def test_import_companies_ignores_rows_committed_concurrently(self):
+        def insert_after_another_import(model, objs, **kwargs):
+            Company.objects.create(name="Other Corp", code="OTH")
+            bulk_insert(model, objs, **kwargs)
+
+        with mock.patch.object(
+            views_bulk_import, "bulk_insert", insert_after_another_import
+        ):
+            messages_list = self.upload(
+                "import_companies", "name,code\nBeta Corp,oth\nGamma,GMA\n"
+            )
+        self.assertIn("✅ Successfully imported 1 company", messages_list)
+        self.assertIn("Row 2: Code 'oth' already exists", messages_list)
+        self.assertFalse(Company.objects.filter(name="Beta Corp").exists())
+
+    def test_import_companies_from_xlsx(self):
+        wb = openpyxl.Workbook()
+        wb.active.append(["name", "code"])
+        wb.active.append(["Beta Corp", 7])
+        wb.active.append(["Gamma", None])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        csv_file = SimpleUploadedFile("import.xlsx", buffer.getvalue())
+        response = self.client.post(
+            reverse("organization:import_companies"), {"csv_file": csv_file}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Company.objects.filter(name="Beta Corp", code="7").exists())
+        self.assertFalse(Company.objects.filter(name="Gamma").exists())
+
+    def test_import_regions_rejects_codes_repeated_in_file(self):
+        messages_list = self.upload(
+            "import_regions",
+            "name,code,company_name\nWest,WST,Acme Ltd\nWestern,wst,Acme Ltd\n"
+            "Shore,cst,Acme Ltd\n",
+        )
+        self.assertEqual(
+            sorted(self.company.regions.values_list("code", flat=True)),
+            ["CST", "WST"],
+        )
+        self.assertIn("Row 3: Code 'wst' already exists", messages_list)
+        self.assertIn("Row 4: Code 'cst' already exists", messages_list)
+
+    def test_import_regions_matches_company_names_caselessly(self):
+        company = Company.objects.create(name="École Ltd", code="ECO")
+        self.upload("import_regions", "name,code,company_name\nNord,NRD,ÉCOLE LTD\n")
+        self.assertTrue(company.regions.filter(code="NRD").exists())
+
+    def test_import_branches_reports_unknown_region(self):
+        messages_list = self.upload(
+            "import_branches",
+            "name,code,phone,region_name,company_name\n"
+            "Mombasa,MSA,,coast,acme ltd\n"
+            "Kisumu,KSM,,Lake,Acme Ltd\n",
+        )
+        self.assertTrue(Branch.objects.filter(name="Mombasa", phone=None).exists())
+        self.assertFalse(Branch.objects.filter(name="Kisumu").exists())
+        self.assertIn(
+            "Row 3: Region 'Lake' not found for company 'Acme Ltd'", messages_list
+        )
+
+    def test_import_branches_rejects_existing_name_or_code(self):
+        Branch.objects.create(name="Mombasa", code="MSA", region=self.region)
+        messages_list = self.upload(
+            "import_branches",
+            "name,code,phone,region_name,company_name\n"
+            "mombasa,NEW,,Coast,Acme Ltd\n"
+            "Malindi,msa,,Coast,Acme Ltd\n"
+            "Kilifi,KLF,,Coast,Acme Ltd\n",
+        )
+        self.assertEqual(
+            sorted(Branch.objects.values_list("code", flat=True)), ["KLF", "MSA"]
+        )
+        self.assertIn("Row 2: Branch 'mombasa' already exists", messages_list)
+        self.assertIn("Row 3: Code 'msa' already exists", messages_list)
+
+    def test_import_branches_query_count_independent_of_rows(self):
+        header = "name,code,phone,region_name,company_name\n"
+        with CaptureQueriesContext(connection) as ctx:
+            self.upload("import_branches", header + "B1,B1,,Coast,Acme Ltd\n")
+        rows = "".join(f"B{i},B{i},,Coast,Acme Ltd\n" for i in range(2, 12))
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.upload("import_branches", header + rows)
+        self.assertEqual(Branch.objects.count(), 11)
+
+    def test_import_departments_skips_duplicates(self):
+        branch = Branch.objects.create(name="Mombasa", code="MSA", region=self.region)
+        Department.objects.create(name="Finance", branch=branch)
+        self.upload(
+            "import_departments",
+            "name,branch_name\nFinance,Mombasa\nOperations,mombasa\n",
+        )
+        self.assertEqual(
+            sorted(branch.departments.values_list("name", flat=True)),
+            ["Finance", "Operations"],
+        )
+
+    def test_import_departments_is_all_or_nothing(self):
+        Branch.objects.create(name="Mombasa", code="MSA", region=self.region)
+
+        def fail_after_first_row(model, objs, **kwargs):
+            bulk_insert(model, objs[:1], **kwargs)
+            raise DatabaseError("connection lost")
+
+        with mock.patch.object(views_bulk_import, "bulk_insert", fail_after_first_row):
+            messages_list = self.upload(
+                "import_departments",
+                "name,branch_name\nFinance,Mombasa\nOperations,Mombasa\n",
+            )
+        self.assertEqual(messages_list, ["Error processing CSV: connection lost"])
+        self.assertFalse(Department.objects.exists())
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL-only")
+class BulkInsertCopyTests(TestCase):
+    """Test the COPY path taken by large imports"""
+
+    def companies(self, count):
+        return [Company(name=f"Company {i}", code=f"C{i}") for i in range(count)]
+
+    def test_copy_inserts_rows(self):
+        bulk_insert(Company, self.companies(COPY_MIN_ROWS))
+        self.assertEqual(Company.objects.count(), COPY_MIN_ROWS)
+        self.assertEqual(Company.objects.get(code="C7").name, "Company 7")
+
+    def test_copy_skips_conflicting_rows(self):
+        Company.objects.create(name="Existing", code="C0")
+        bulk_insert(Company, self.companies(COPY_MIN_ROWS), ignore_conflicts=True)
+        self.assertEqual(Company.objects.count(), COPY_MIN_ROWS)
+        self.assertFalse(Company.objects.filter(name="Company 0").exists())
+        # The staging table is gone, so a second import can run
+        bulk_insert(Company, self.companies(COPY_MIN_ROWS), ignore_conflicts=True)
+        self.assertEqual(Company.objects.count(), COPY_MIN_ROWS)
+
+
+class PositionViewTests(TestCase):
+    """Test position management views"""
+
+    def setUp(self):
+        company = Company.objects.create(name="Acme Ltd", code="ACME")
+        region = Region.objects.create(name="Coast", code="CST", company=company)
+        branch = Branch.objects.create(name="Mombasa", code="MSA", region=region)
+        self.department = Department.objects.create(name="Finance", branch=branch)
+        self.position = Position.objects.create(
+            title="Accountant", department=self.department
+        )
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test123", email="admin@test.com", role="admin"
+        )
+        self.client.force_login(self.admin)
+
+    def test_manage_positions_renders_without_deferred_loads(self):
+        url = reverse("organization:manage_positions")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, "Accountant")
+        self.assertContains(response, "Coast")
+
+        # Extra rows must not add queries (no lazy loading of deferred fields)
+        Position.objects.create(title="Clerk", department=self.department)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.client.get(url)
+
+    def test_create_position_rejects_duplicate_and_unknown_department(self):
+        url = reverse("organization:create_position")
+        response = self.client.post(
+            url, {"title": "Accountant", "department": self.department.id}
+        )
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(Position.objects.filter(title="Accountant").count(), 1)
+
+        response = self.client.post(url, {"title": "Clerk", "department": "abc"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_matches_partial_terms(self):
+        Position.objects.create(title="Clerk", department=self.department)
+        url = reverse("organization:manage_positions")
+        response = self.client.get(url, {"search": "acc"})
+        self.assertContains(response, "Accountant")
+        self.assertNotContains(response, "Clerk")
+
+        response = self.client.get(url, {"search": "fin"})
+        self.assertContains(response, "Accountant")
+        self.assertContains(response, "Clerk")
+
+    def test_search_query_matches_each_word_as_a_prefix(self):
+        self.assertEqual(
+            position_search_query("  Senior acc-(fin) "),
+            SearchQuery("Senior:* & acc:* & fin:*", search_type="raw"),
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "search_vector is PostgreSQL-only")
+class PositionSearchVectorTests(TestCase):
+    """Test that Position.search_vector is computed in SQL"""
+
+    def setUp(self):
+        company = Company.objects.create(name="Acme Ltd", code="ACME")
+        region = Region.objects.create(name="Coast", code="CST", company=company)
+        branch = Branch.objects.create(name="Mombasa", code="MSA", region=region)
+        self.department = Department.objects.create(name="Finance", branch=branch)
+
+    def matching(self, term):
+        return Position.objects.filter(search_vector=SearchQuery(term))
+
+    def test_save_does_not_load_the_department(self):
+        position = Position(title="Accountant", department_id=self.department.id)
+        # INSERT, then one UPDATE that reads the department name in SQL
+        with self.assertNumQueries(2):
+            position.save()
+        self.assertEqual(list(self.matching("finance")), [position])
+
+    def test_refresh_fills_bulk_created_positions(self):
+        Position.objects.bulk_create(
+            [Position(title=title, department=self.department) for title in "AB"]
+        )
+        self.assertFalse(self.matching("finance").exists())
+
+        self.assertEqual(Position.objects.all().refresh_search_vectors(), 2)
+        self.assertEqual(self.matching("finance").count(), 2)
+
+    def test_department_rename_refreshes_positions(self):
+        Position.objects.create(title="Accountant", department=self.department)
+        self.department.name = "Treasury"
+        self.department.save()
+        self.assertTrue(self.matching("treasury").exists())
+        self.assertFalse(self.matching("finance").exists())
+
+
+class CompanyBranchViewTests(TestCase):
+    """Test company and branch management views"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme Ltd", code="ACME")
+        region = Region.objects.create(name="Coast", code="CST", company=self.company)
+        self.branch = Branch.objects.create(name="Mombasa", code="MSA", region=region)
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test123", email="admin@test.com", role="admin"
+        )
+        self.client.force_login(self.admin)
+
+    def messages(self, response):
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_create_company_rejects_case_variant_duplicates(self):
+        url = reverse("organization:create_company")
+        response = self.client.post(url, {"name": "ACME LTD", "code": "NEW"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Company 'ACME LTD' already exists.", self.messages(response))
+
+        response = self.client.post(url, {"name": "Beta", "code": "acme"})
+        self.assertIn("Company code 'acme' is already in use.", self.messages(response))
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_edit_branch_allows_own_code_but_not_another(self):
+        other = Branch.objects.create(
+            name="Kilifi", code="KLF", region=self.branch.region
+        )
+        url = reverse("organization:edit_branch", args=[self.branch.id])
+        response = self.client.post(url, {"name": "Mombasa CBD", "code": "msa"})
+        self.assertRedirects(
+            response,
+            reverse("organization:manage_branches"),
+            fetch_redirect_response=False,
+        )
 
-# Create your tests here.
+        response = self.client.post(url, {"name": "kilifi", "code": "MSA"})
+        self.assertIn("Branch 'kilifi' already exists.", self.messages(response))
+        self.assertEqual(Branch.objects.get(id=other.id).name, "Kilifi")
@@ -3,9 +3,14 @@ Organization Admin Views
 Provides UI for managing Cost Centers and Positions.
 """
 
+import re
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count, Q
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
 from accounts.models import User
@@ -220,6 +225,42 @@ def delete_cost_center(request, cost_center_id):
 # ===========================
 
 
+def get_department_for_position(department_id, title, exclude_position_id=None):
+    """
+    Fetch a department's id and name together with whether `title` is already
+    used by one of its positions. Raises Http404 if the department doesn't exist.
+    """
+    try:
+        department_id = int(department_id)
+    except (TypeError, ValueError):
+        raise Http404("Department not found")
+
+    duplicates = Position.objects.filter(title=title, department=OuterRef("pk"))
+    if exclude_position_id is not None:
+        duplicates = duplicates.exclude(id=exclude_position_id)
+
+    department = (
+        Department.objects.filter(pk=department_id)
+        .annotate(title_taken=Exists(duplicates))
+        .values("id", "name", "title_taken")
+        .first()
+    )
+    if department is None:
+        raise Http404("Department not found")
+    return department
+
+
+def position_search_query(text):
+    """
+    Full-text query matching every word of the search box as a prefix,
+    so partial terms like "acc" still find "Accountant"
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return SearchQuery("")
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw")
+
+
 @login_required
 @user_passes_test(is_admin_user)
 def manage_positions(request):
@@ -231,6 +272,12 @@ def manage_positions(request):
         Position.objects.select_related(
             "department", "department__branch", "department__branch__region"
         )
+        .only(
+            "title",
+            "department__name",
+            "department__branch__name",
+            "department__branch__region__name",
+        )
         .annotate(user_count=Count("user"))
         .order_by("department__branch__name", "department__name", "title")
     )
@@ -247,10 +294,16 @@ def manage_positions(request):
         positions = positions.filter(department__branch_id=branch_filter)
 
     if search_query:
-        positions = positions.filter(
-            Q(title__icontains=search_query)
-            | Q(department__name__icontains=search_query)
-        )
+        if connection.vendor == "postgresql":
+            # One GIN-indexed full-text match on title + department name
+            positions = positions.filter(
+                search_vector=position_search_query(search_query)
+            )
+        else:
+            positions = positions.filter(
+                Q(title__icontains=search_query)
+                | Q(department__name__icontains=search_query)
+            )
 
     # Statistics
     stats = {
@@ -291,16 +344,16 @@ def create_position(request):
             messages.error(request, "Title and department are required.")
             return redirect("organization:create_position")
 
-        department = get_object_or_404(Department, id=department_id)
+        # Existence, name and duplicate check in one query
+        department = get_department_for_position(department_id, title)
 
-        # Check for duplicates
-        if Position.objects.filter(title=title, department=department).exists():
+        if department["title_taken"]:
             messages.error(
-                request, f"Position '{title}' already exists in {department.name}."
+                request, f"Position '{title}' already exists in {department['name']}."
             )
             return redirect("organization:create_position")
 
-        position = Position.objects.create(title=title, department=department)
+        position = Position.objects.create(title=title, department_id=department["id"])
 
         messages.success(request, f"Position '{position.title}' created successfully.")
         return redirect("organization:manage_positions")
@@ -333,21 +386,19 @@ def edit_position(request, position_id):
             messages.error(request, "Title and department are required.")
             return redirect("organization:edit_position", position_id=position_id)
 
-        department = get_object_or_404(Department, id=department_id)
+        # Existence, name and duplicate check (excluding current) in one query
+        department = get_department_for_position(
+            department_id, title, exclude_position_id=position.id
+        )
 
-        # Check for duplicates (excluding current)
-        if (
-            Position.objects.filter(title=title, department=department)
-            .exclude(id=position.id)
-            .exists()
-        ):
+        if department["title_taken"]:
             messages.error(
-                request, f"Position '{title}' already exists in {department.name}."
+                request, f"Position '{title}' already exists in {department['name']}."
             )
             return redirect("organization:edit_position", position_id=position_id)
 
         position.title = title
-        position.department = department
+        position.department_id = department["id"]
         position.save()
 
         messages.success(request, f"Position '{position.title}' updated successfully.")
@@ -356,7 +407,8 @@ def edit_position(request, position_id):
     # Get assigned users
     assigned_users = (
         User.objects.filter(position_title=position)
-        .select_related("department", "branch", "company")
+        .select_related("department")
+        .only("first_name", "last_name", "email", "role", "department__name")
         .order_by("first_name", "last_name")
     )
 
@@ -403,6 +455,20 @@ def delete_position(request, position_id):
 # ===========================
 
 
+def name_or_code_taken(model, name, code, exclude_id=None):
+    """
+    Return an error message if another `model` row already uses `name` or
+    `code`, compared ignoring case like the unique constraints; else None.
+    """
+    others = model.objects.exclude(id=exclude_id)
+    label = model._meta.verbose_name.capitalize()
+    if others.filter(name__iexact=name).exists():
+        return f"{label} '{name}' already exists."
+    if others.filter(code__iexact=code).exists():
+        return f"{label} code '{code}' is already in use."
+    return None
+
+
 @login_required
 @user_passes_test(is_admin_user)
 def manage_companies(request):
@@ -432,12 +498,18 @@ def create_company(request):
         name = request.POST.get("name")
         code = request.POST.get("code")
 
-        try:
-            company = Company.objects.create(name=name, code=code)
-            messages.success(request, f"Company '{company.name}' created successfully.")
-            return redirect("organization:manage_companies")
-        except Exception as e:
-            messages.error(request, f"Error creating company: {str(e)}")
+        error = name_or_code_taken(Company, name, code)
+        if error:
+            messages.error(request, error)
+        else:
+            try:
+                company = Company.objects.create(name=name, code=code)
+                messages.success(
+                    request, f"Company '{company.name}' created successfully."
+                )
+                return redirect("organization:manage_companies")
+            except Exception as e:
+                messages.error(request, f"Error creating company: {str(e)}")
 
     return render(request, "organization/create_company.html")
 
@@ -452,12 +524,20 @@ def edit_company(request, company_id):
         company.name = request.POST.get("name")
         company.code = request.POST.get("code")
 
-        try:
-            company.save()
-            messages.success(request, f"Company '{company.name}' updated successfully.")
-            return redirect("organization:manage_companies")
-        except Exception as e:
-            messages.error(request, f"Error updating company: {str(e)}")
+        error = name_or_code_taken(
+            Company, company.name, company.code, exclude_id=company.id
+        )
+        if error:
+            messages.error(request, error)
+        else:
+            try:
+                company.save()
+                messages.success(
+                    request, f"Company '{company.name}' updated successfully."
+                )
+                return redirect("organization:manage_companies")
+            except Exception as e:
+                messages.error(request, f"Error updating company: {str(e)}")
 
     context = {"company": company}
     return render(request, "organization/edit_company.html", context)
@@ -533,14 +613,20 @@ def create_branch(request):
         phone = request.POST.get("phone")
         region_id = request.POST.get("region")
 
-        try:
-            branch = Branch.objects.create(
-                name=name, code=code, phone=phone, region_id=region_id
-            )
-            messages.success(request, f"Branch '{branch.name}' created successfully.")
-            return redirect("organization:manage_branches")
-        except Exception as e:
-            messages.error(request, f"Error creating branch: {str(e)}")
+        error = name_or_code_taken(Branch, name, code)
+        if error:
+            messages.error(request, error)
+        else:
+            try:
+                branch = Branch.objects.create(
+                    name=name, code=code, phone=phone, region_id=region_id
+                )
+                messages.success(
+                    request, f"Branch '{branch.name}' created successfully."
+                )
+                return redirect("organization:manage_branches")
+            except Exception as e:
+                messages.error(request, f"Error creating branch: {str(e)}")
 
     context = {
         "regions": Region.objects.select_related("company").order_by(
@@ -564,12 +650,20 @@ def edit_branch(request, branch_id):
         if region_id:
             branch.region_id = region_id
 
-        try:
-            branch.save()
-            messages.success(request, f"Branch '{branch.name}' updated successfully.")
-            return redirect("organization:manage_branches")
-        except Exception as e:
-            messages.error(request, f"Error updating branch: {str(e)}")
+        error = name_or_code_taken(
+            Branch, branch.name, branch.code, exclude_id=branch.id
+        )
+        if error:
+            messages.error(request, error)
+        else:
+            try:
+                branch.save()
+                messages.success(
+                    request, f"Branch '{branch.name}' updated successfully."
+                )
+                return redirect("organization:manage_branches")
+            except Exception as e:
+                messages.error(request, f"Error updating branch: {str(e)}")
 
     context = {
         "branch": branch,
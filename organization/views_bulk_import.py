@@ -1,19 +1,26 @@
 """
 Bulk Import for Organization Entities
 Handles Excel uploads for Companies, Regions, Branches, Departments, Cost Centers, Positions
+
+Imports validate every row in Python first (against prefetched lookups) and
+only then write the valid rows in bulk, so no transaction is held open while
+the upload is parsed. A bad row is reported and skipped; it never aborts the
+transaction for the rows around it. Duplicates are dropped by the unique
+constraints (ON CONFLICT DO NOTHING), and an unexpected database error
+rolls the whole insert back.
 """
 
 import csv
+import heapq
 import io
+from pathlib import Path
 
-import openpyxl
-import pandas as pd
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
-from django.db import transaction
-from django.http import HttpResponse
+from django.db import connection, transaction
+from django.db.models.functions import Upper
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
-from openpyxl.styles import Font, PatternFill
 
 from organization.models import (
     Branch,
@@ -25,6 +32,269 @@ from organization.models import (
 )
 from settings_manager.views import log_activity
 
+# Pre-built company import workbook (headers, example row, instructions sheet)
+COMPANIES_TEMPLATE_PATH = (
+    Path(__file__).resolve().parent
+    / "static"
+    / "organization"
+    / "companies_import_template.xlsx"
+)
+
+# Rows fetched per round-trip when templates list available entities
+TEMPLATE_CHUNK_SIZE = 500
+
+# Rows sent per INSERT statement by the importers
+IMPORT_BATCH_SIZE = 500
+
+# Imports at least this large are streamed with COPY on PostgreSQL
+COPY_MIN_ROWS = 1000
+
+# Row errors listed after an import; the rest are only counted
+MAX_LISTED_ERRORS = 10
+
+
+class Echo:
+    """Pseudo-buffer whose write() returns the value, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, filename):
+    """Stream `rows` (lists of cells) as a CSV attachment without buffering it"""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows), content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def is_data_row(name):
+    """Rows need a name; the template's INSTRUCTIONS block marks the end of data"""
+    return bool(name) and not name.startswith("INSTRUCTIONS")
+
+
+def check_header(header):
+    """Reject an upload up front when its header lacks the required name column"""
+    if "name" not in header:
+        raise ValueError("The file has no 'name' column")
+
+
+def parse_upload(csv_file, errors):
+    """
+    Parse an uploaded CSV file into (row_num, row dict) pairs, row_num being
+    the line in the file the row starts on (the header is line 1). Cells are
+    read as stripped strings; rows without a name are dropped and a row
+    starting with INSTRUCTIONS ends the data. Rows with the wrong number of
+    columns are reported to `errors` (a RowErrors). The file is streamed
+    rather than read into memory.
+    """
+    csv_file.seek(0)
+    header = next(csv.reader([csv_file.readline().decode("utf-8")]), [])
+    check_header(header)
+
+    # The header line has been consumed; the reader continues from line 2.
+    # pandas' chunked read_csv is not used here: it cannot report line
+    # numbers and silently truncates over-long rows after the first chunk.
+    lines = io.TextIOWrapper(csv_file.file, encoding="utf-8", newline="")
+    reader = csv.reader(lines)
+
+    def records():
+        # A quoted cell may span lines, so a row starts one line after the
+        # previous row ended rather than at reader.line_num
+        row_num = 2
+        for values in reader:
+            if values and values[0].strip().startswith("INSTRUCTIONS"):
+                break
+            if len(values) != len(header):
+                if any(value.strip() for value in values):
+                    errors.add(
+                        row_num, f"Expected {len(header)} columns, found {len(values)}"
+                    )
+            else:
+                row = {key: value.strip() for key, value in zip(header, values)}
+                if row["name"]:
+                    yield row_num, row
+            row_num = reader.line_num + 2
+
+    return records()
+
+
+def parse_workbook(excel_file):
+    """
+    Parse the active sheet of an uploaded .xlsx workbook into (row_num, row
+    dict) pairs, cleaned like parse_upload(). The workbook is opened read-only
+    so rows are streamed rather than loaded into memory at once.
+    """
+    # Imported here so only Excel uploads pay for loading openpyxl
+    import openpyxl
+
+    wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [
+            str(cell).strip() if cell is not None else None for cell in next(rows, ())
+        ]
+        check_header(header)
+        for row_num, values in enumerate(rows, start=2):
+            row = {
+                key: ("" if value is None else str(value).strip())
+                for key, value in zip(header, values)
+                if key is not None
+            }
+            if is_data_row(row.get("name")):
+                yield row_num, row
+    finally:
+        wb.close()
+
+
+def casefold_map(pairs):
+    """
+    Build a case-insensitive {name: id} lookup from (name, id) pairs. Folding
+    in Python keeps LOWER() off the database and matches the folding applied
+    to uploaded values.
+    """
+    return {name.casefold(): pk for name, pk in pairs}
+
+
+class RowErrors:
+    """
+    Row errors of an import. Every error is counted, but only the
+    MAX_LISTED_ERRORS lowest row numbers are kept, so memory stays bounded and
+    rows the database rejects after validation still list in file order.
+    """
+
+    def __init__(self):
+        self.count = 0
+        # Min-heap on -row_num: the highest kept row is evicted first
+        self._kept = []
+
+    def add(self, row_num, message):
+        self.count += 1
+        entry = (-row_num, f"Row {row_num}: {message}")
+        if len(self._kept) < MAX_LISTED_ERRORS:
+            heapq.heappush(self._kept, entry)
+        elif entry > self._kept[0]:
+            heapq.heapreplace(self._kept, entry)
+
+    def __iter__(self):
+        return (message for _, message in sorted(self._kept, reverse=True))
+
+    @property
+    def unlisted(self):
+        return self.count - len(self._kept)
+
+
+def report_import_results(request, success_count, errors, label, plural):
+    """
+    Flash the outcome of a bulk import and log successful imports.
+    `label` is shown to the user (e.g. "region(s)"), `plural` goes to the
+    activity log (e.g. "regions"); `errors` is the import's RowErrors.
+    """
+    if success_count > 0:
+        messages.success(request, f"✅ Successfully imported {success_count} {label}")
+        log_activity(
+            request.user, "ORG_BULK_IMPORT", f"Imported {success_count} {plural}"
+        )
+
+    if errors.count > 0:
+        messages.warning(request, f"⚠️ {errors.count} row(s) failed")
+        listed = list(errors)
+        if errors.unlisted:
+            listed.append(f"...and {errors.unlisted} more")
+        # One message (rendered line by line) rather than one per row
+        messages.error(request, "\n".join(listed))
+
+
+def bulk_insert(model, objs, ignore_conflicts=False):
+    """
+    Insert unsaved model instances in as few round-trips as possible.
+    Large imports on PostgreSQL are streamed with COPY (through a temporary
+    table and INSERT ... ON CONFLICT DO NOTHING when ignoring conflicts);
+    everything else goes through batched bulk_create. Neither path sets
+    primary keys on `objs` or sends signals.
+    """
+    if connection.vendor != "postgresql" or len(objs) < COPY_MIN_ROWS:
+        model.objects.bulk_create(
+            objs, batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=ignore_conflicts
+        )
+        return
+
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+
+    # NULL is spelled \N so that empty strings survive the CSV round-trip
+    copy_options = "WITH (FORMAT csv, NULL '\\N')"
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        values = (
+            f.get_db_prep_save(f.pre_save(obj, add=True), connection) for f in fields
+        )
+        writer.writerow(["\\N" if value is None else value for value in values])
+
+    with connection.cursor() as cursor:
+        if not ignore_conflicts:
+            # psycopg 3 streams COPY data through a context manager
+            with cursor.copy(
+                f"COPY {table} ({columns}) FROM STDIN {copy_options}"
+            ) as copy:
+                copy.write(buffer.getvalue())
+            return
+
+        staging = connection.ops.quote_name(f"import_{model._meta.db_table}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(
+            f"COPY {staging} ({columns}) FROM STDIN {copy_options}"
+        ) as copy:
+            copy.write(buffer.getvalue())
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+            "ON CONFLICT DO NOTHING"
+        )
+        # Dropped now rather than at commit, so a second import in the same
+        # transaction can create it again
+        cursor.execute(f"DROP TABLE {staging}")
+
+
+def insert_new_rows(model, pending, key_field, match_fields):
+    """
+    Insert the objects in `pending` ({upper-cased `key_field`: (row_num, obj)}),
+    letting the model's unique constraints drop rows that already exist.
+    A row counts as created only if it is new and its `match_fields` hold
+    what this import sent, so rows committed concurrently under the same key
+    are reported as rejections. Returns how many rows were created and the
+    (row_num, obj) pairs that were not, in file order.
+    """
+    if not pending:
+        return 0, []
+
+    stored = model.objects.annotate(import_key=Upper(key_field)).filter(
+        import_key__in=pending
+    )
+    with transaction.atomic():
+        existing = set(stored.values_list("import_key", flat=True))
+        bulk_insert(model, [obj for _, obj in pending.values()], ignore_conflicts=True)
+        # ignore_conflicts leaves pks unset, so read back what landed
+        created = {
+            key
+            for key, *values in stored.exclude(import_key__in=existing).values_list(
+                "import_key", *match_fields
+            )
+            if values == [getattr(pending[key][1], field) for field in match_fields]
+        }
+    rejected = sorted(
+        (entry for key, entry in pending.items() if key not in created),
+        key=lambda entry: entry[0],
+    )
+    return len(created), rejected
+
+
 # ============================================
 # COMPANIES
 # ============================================
@@ -34,54 +304,12 @@ from settings_manager.views import log_activity
 @permission_required("organization.add_company", raise_exception=True)
 def download_companies_template(request):
     """Download Excel template for bulk company import"""
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Companies"
-
-    # Headers
-    headers = ["name", "code"]
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = Font(bold=True, color="FFFFFF")
-        cell.fill = PatternFill(
-            start_color="4472C4", end_color="4472C4", fill_type="solid"
-        )
-
-    # Single example row
-    ws.append(["DemoCo", "DEMO"])
-
-    # Column widths
-    ws.column_dimensions["A"].width = 30
-    ws.column_dimensions["B"].width = 15
-
-    # Instructions sheet
-    ws2 = wb.create_sheet("Instructions")
-    ws2["A1"] = "Company Import Instructions"
-    ws2["A1"].font = Font(bold=True, size=14)
-    instructions = [
-        "",
-        "FIELD REQUIREMENTS:",
-        "• name: Company name (must be unique)",
-        "• code: Short code (2-10 characters, must be unique)",
-        "",
-        "INSTRUCTIONS:",
-        "1. Fill in the 'Companies' sheet with your data",
-        "2. Delete the example rows before uploading",
-        "3. Save and upload the file",
-    ]
-    for row_num, instruction in enumerate(instructions, 2):
-        ws2[f"A{row_num}"] = instruction
-    ws2.column_dimensions["A"].width = 60
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = (
-        'attachment; filename="companies_import_template.xlsx"'
+    # The workbook doesn't depend on the database, so it ships pre-built
+    return FileResponse(
+        open(COMPANIES_TEMPLATE_PATH, "rb"),
+        as_attachment=True,
+        filename="companies_import_template.xlsx",
     )
-    wb.save(response)
-    return response
 
 
 @login_required
@@ -91,93 +319,81 @@ def import_companies(request):
     if request.method == "POST" and request.FILES.get("csv_file"):
         uploaded_file = request.FILES["csv_file"]
 
-        is_excel = uploaded_file.name.endswith((".xlsx", ".xls"))
+        # openpyxl reads .xlsx only; legacy .xls needs converting first
+        is_excel = uploaded_file.name.endswith(".xlsx")
         is_csv = uploaded_file.name.endswith(".csv")
 
         if not (is_excel or is_csv):
-            messages.error(request, "Please upload an Excel or CSV file")
-            return redirect("import_organizations")
+            messages.error(request, "Please upload an Excel (.xlsx) or CSV file")
+            return redirect("organization:import_organizations")
 
         try:
+            errors = RowErrors()
             if is_excel:
-                df = pd.read_excel(uploaded_file)
-                data_rows = df.to_dict("records")
+                data_rows = parse_workbook(uploaded_file)
             else:
-                decoded_file = uploaded_file.read().decode("utf-8")
-                io_string = io.StringIO(decoded_file)
-                reader = csv.DictReader(io_string)
-                data_rows = list(reader)
+                data_rows = parse_upload(uploaded_file, errors)
 
             success_count = 0
-            error_count = 0
-            errors = []
-
-            with transaction.atomic():
-                for row_num, row in enumerate(data_rows, start=2):
-                    try:
-                        if is_excel:
-                            row = {
-                                k: (str(v) if pd.notna(v) else "")
-                                for k, v in row.items()
-                            }
-
-                        if not row.get("name") or str(row.get("name", "")).startswith(
-                            "INSTRUCTIONS"
-                        ):
-                            continue
-
-                        name = str(row["name"]).strip()
-                        code = str(row["code"]).strip()
-
-                        if not name or not code:
-                            errors.append(f"Row {row_num}: Missing name or code")
-                            error_count += 1
-                            continue
-
-                        if Company.objects.filter(name__iexact=name).exists():
-                            errors.append(
-                                f"Row {row_num}: Company '{name}' already exists"
-                            )
-                            error_count += 1
-                            continue
-
-                        if Company.objects.filter(code__iexact=code).exists():
-                            errors.append(
-                                f"Row {row_num}: Code '{code}' already exists"
-                            )
-                            error_count += 1
-                            continue
-
-                        Company.objects.create(name=name, code=code)
-                        success_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                        error_count += 1
-
-            if success_count > 0:
-                messages.success(
-                    request,
-                    f'✅ Successfully imported {success_count} compan{"y" if success_count == 1 else "ies"}',
-                )
-                log_activity(
-                    request.user,
-                    "ORG_BULK_IMPORT",
-                    f"Imported {success_count} companies",
+            # Validated rows keyed by upper-cased code; file-level duplicates
+            # are caught here, database duplicates by the unique constraints.
+            pending = {}
+            seen_names = set()
+
+            for row_num, row in data_rows:
+                try:
+
+                    name = row["name"]
+                    code = row["code"]
+
+                    if not (name and code):
+                        errors.add(row_num, "Missing name or code")
+                        continue
+
+                    if name.upper() in seen_names:
+                        errors.add(row_num, f"Company '{name}' already exists")
+                        continue
+
+                    if code.upper() in pending:
+                        errors.add(row_num, f"Code '{code}' already exists")
+                        continue
+
+                    seen_names.add(name.upper())
+                    pending[code.upper()] = (row_num, Company(name=name, code=code))
+
+                except Exception as e:
+                    errors.add(row_num, str(e))
+
+            success_count, rejected = insert_new_rows(
+                Company, pending, "code", ["name"]
+            )
+            if rejected:
+                taken_names = set(
+                    Company.objects.annotate(upper_name=Upper("name"))
+                    .filter(upper_name__in=[c.name.upper() for _, c in rejected])
+                    .values_list("upper_name", flat=True)
                 )
-
-            if error_count > 0:
-                messages.warning(request, f"⚠️ {error_count} row(s) failed")
-                for error in errors[:10]:
-                    messages.error(request, error)
-
-            return redirect("import_organizations")
+                for row_num, company in rejected:
+                    if company.name.upper() in taken_names:
+                        errors.add(row_num, f"Company '{company.name}' already exists")
+                    else:
+                        errors.add(row_num, f"Code '{company.code}' already exists")
+
+            report_import_results(
+                request,
+                success_count,
+                errors,
+                "company" if success_count == 1 else "companies",
+                "companies",
+            )
+
+            return redirect("organization:import_organizations")
 
         except Exception as e:
             messages.error(request, f"Error processing CSV: {str(e)}")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
 
-    return redirect("import_organizations")
+    return redirect("organization:import_organizations")
 
 
 # ============================================
@@ -192,43 +408,42 @@ def download_regions_template(request):
     # Get filter parameter
     company_id = request.GET.get("company")
 
-    response = HttpResponse(content_type="text/csv")
-
     # Filter companies if specified
+    companies = Company.objects.all()
     if company_id:
-        companies = Company.objects.filter(id=company_id)
-        company_name = companies.first().name if companies.exists() else "filtered"
-        response["Content-Disposition"] = (
-            f'attachment; filename="regions_{company_name.replace(" ", "_")}_template.csv"'
-        )
-    else:
-        companies = Company.objects.all()
-        response["Content-Disposition"] = (
-            'attachment; filename="regions_import_template.csv"'
-        )
-
-    writer = csv.writer(response)
-    writer.writerow(["name", "code", "company_name"])
-    # Single example row
-    if companies.exists():
-        example_company = companies.first()
-        writer.writerow(
-            ["DemoRegion", f"{example_company.code}DR", example_company.name]
-        )
-    else:
-        writer.writerow(["DemoRegion", "DR", "DemoCo"])
+        companies = companies.filter(id=company_id)
 
-    writer.writerow([])
-    writer.writerow(["INSTRUCTIONS:"])
-    writer.writerow(["- name: Region name"])
-    writer.writerow(["- code: Short code (2-10 characters, must be unique)"])
-    writer.writerow(["- company_name: Must exactly match existing company name"])
+    # Fetched once: fills the example row and names a filtered download
+    example_company = companies.first()
     if company_id:
-        writer.writerow([f"- FILTERED: Only showing regions for selected company"])
-    writer.writerow([])
-    writer.writerow(["AVAILABLE COMPANIES: (omitted for brevity)"])
-
-    return response
+        company_name = example_company.name if example_company else "filtered"
+        filename = f'regions_{company_name.replace(" ", "_")}_template.csv'
+    else:
+        filename = "regions_import_template.csv"
+
+    def rows():
+        yield ["name", "code", "company_name"]
+        # Single example row
+        if example_company:
+            yield ["DemoRegion", f"{example_company.code}DR", example_company.name]
+        else:
+            yield ["DemoRegion", "DR", "DemoCo"]
+
+        yield []
+        yield ["INSTRUCTIONS:"]
+        yield ["- name: Region name"]
+        yield ["- code: Short code (2-10 characters, must be unique)"]
+        yield ["- company_name: Must exactly match existing company name"]
+        if company_id:
+            yield ["- FILTERED: Only showing regions for selected company"]
+        yield []
+        yield ["AVAILABLE COMPANIES:"]
+        for company in companies.order_by("name").iterator(
+            chunk_size=TEMPLATE_CHUNK_SIZE
+        ):
+            yield [f"- {company.name} ({company.code})"]
+
+    return stream_csv(rows(), filename)
 
 
 @login_required
@@ -237,81 +452,60 @@ def import_regions(request):
     """Bulk import regions from CSV"""
     if request.method == "POST" and request.FILES.get("csv_file"):
         csv_file = request.FILES["csv_file"]
-        is_excel = csv_file.name.endswith((".xlsx", ".xls"))
         if not csv_file.name.endswith(".csv"):
             messages.error(request, "Please upload a CSV file")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
         try:
-            decoded_file = csv_file.read().decode("utf-8")
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string)
-            data_rows = list(reader)
+            errors = RowErrors()
+            data_rows = parse_upload(csv_file, errors)
             success_count = 0
-            error_count = 0
-            errors = []
-            with transaction.atomic():
-                for row_num, row in enumerate(data_rows, start=2):
-                    try:
-                        if is_excel:
-                            row = {
-                                k: (str(v) if pd.notna(v) else "")
-                                for k, v in row.items()
-                            }
-                        if not row.get("name") or str(row.get("name", "")).startswith(
-                            "INSTRUCTIONS"
-                        ):
-                            continue
-                        name = str(row["name"]).strip()
-                        code = str(row["code"]).strip()
-                        company_name = str(row["company_name"]).strip()
-                        if not all([name, code, company_name]):
-                            errors.append(f"Row {row_num}: Missing required fields")
-                            error_count += 1
-                            continue
-
-                        try:
-                            company = Company.objects.get(name__iexact=company_name)
-                        except Company.DoesNotExist:
-                            errors.append(
-                                f"Row {row_num}: Company '{company_name}' not found"
-                            )
-                            error_count += 1
-                            continue
-
-                        if Region.objects.filter(code__iexact=code).exists():
-                            errors.append(
-                                f"Row {row_num}: Code '{code}' already exists"
-                            )
-                            error_count += 1
-                            continue
-
-                        Region.objects.create(name=name, code=code, company=company)
-                        success_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                        error_count += 1
-
-            if success_count > 0:
-                messages.success(
-                    request, f"✅ Successfully imported {success_count} region(s)"
-                )
-                log_activity(
-                    request.user, "ORG_BULK_IMPORT", f"Imported {success_count} regions"
-                )
-
-            if error_count > 0:
-                messages.warning(request, f"⚠️ {error_count} row(s) failed")
-                for error in errors[:10]:
-                    messages.error(request, error)
-
-            return redirect("import_organizations")
+            company_ids = casefold_map(Company.objects.values_list("name", "id"))
+            # Validated rows keyed by upper-cased code; file-level duplicates
+            # are caught here, database duplicates by the unique constraint.
+            pending = {}
+            for row_num, row in data_rows:
+                try:
+                    name = row["name"]
+                    code = row["code"]
+                    company_name = row["company_name"]
+                    if not (name and code and company_name):
+                        errors.add(row_num, "Missing required fields")
+                        continue
+
+                    company_id = company_ids.get(company_name.casefold())
+                    if company_id is None:
+                        errors.add(row_num, f"Company '{company_name}' not found")
+                        continue
+
+                    if code.upper() in pending:
+                        errors.add(row_num, f"Code '{code}' already exists")
+                        continue
+
+                    pending[code.upper()] = (
+                        row_num,
+                        Region(name=name, code=code, company_id=company_id),
+                    )
+
+                except Exception as e:
+                    errors.add(row_num, str(e))
+
+            success_count, rejected = insert_new_rows(
+                Region, pending, "code", ["name", "company_id"]
+            )
+            for row_num, region in rejected:
+                errors.add(row_num, f"Code '{region.code}' already exists")
+
+            report_import_results(
+                request, success_count, errors, "region(s)", "regions"
+            )
+
+            return redirect("organization:import_organizations")
 
         except Exception as e:
             messages.error(request, f"Error processing CSV: {str(e)}")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
 
-    return redirect("import_organizations")
+    return redirect("organization:import_organizations")
 
 
 # ============================================
@@ -327,52 +521,57 @@ def download_branches_template(request):
     company_id = request.GET.get("company")
     region_id = request.GET.get("region")
 
-    response = HttpResponse(content_type="text/csv")
-
     # Filter regions based on parameters
     regions = Region.objects.select_related("company").all()
     filename_parts = ["branches"]
 
     if region_id:
         regions = regions.filter(id=region_id)
-        if regions.exists():
-            filename_parts.append(regions.first().name.replace(" ", "_"))
     elif company_id:
         regions = regions.filter(company_id=company_id)
-        company = Company.objects.filter(id=company_id).first()
-        if company:
-            filename_parts.append(company.name.replace(" ", "_"))
-
-    response["Content-Disposition"] = (
-        f'attachment; filename="{"_".join(filename_parts)}_template.csv"'
-    )
 
-    writer = csv.writer(response)
-    writer.writerow(["name", "code", "phone", "region_name", "company_name"])
-    # Single example row
-    if regions.exists():
-        r = regions.first()
-        writer.writerow(
-            ["DemoBranch", f"{r.code}DB", "+254700000000", r.name, r.company.name]
-        )
-    else:
-        writer.writerow(["DemoBranch", "DB", "+254700000000", "DemoRegion", "DemoCo"])
-
-    writer.writerow([])
-    writer.writerow(["INSTRUCTIONS:"])
-    writer.writerow(["- name: Branch name (must be unique)"])
-    writer.writerow(["- code: Short code (2-10 characters, must be unique)"])
-    writer.writerow(["- phone: Contact phone number (optional)"])
-    writer.writerow(["- region_name: Must exactly match existing region"])
-    writer.writerow(["- company_name: Must exactly match existing company"])
+    # Fetched once: fills the example row and names a filtered download
+    example_region = regions.first()
     if region_id:
-        writer.writerow([f"- FILTERED: Only showing branches for selected region"])
+        if example_region:
+            filename_parts.append(example_region.name.replace(" ", "_"))
     elif company_id:
-        writer.writerow([f"- FILTERED: Only showing branches for selected company"])
-    writer.writerow([])
-    writer.writerow(["AVAILABLE REGIONS (omitted for brevity)"])
+        company = (
+            example_region.company
+            if example_region
+            else Company.objects.filter(id=company_id).first()
+        )
+        if company:
+            filename_parts.append(company.name.replace(" ", "_"))
 
-    return response
+    def rows():
+        yield ["name", "code", "phone", "region_name", "company_name"]
+        # Single example row
+        r = example_region
+        if r:
+            yield ["DemoBranch", f"{r.code}DB", "+254700000000", r.name, r.company.name]
+        else:
+            yield ["DemoBranch", "DB", "+254700000000", "DemoRegion", "DemoCo"]
+
+        yield []
+        yield ["INSTRUCTIONS:"]
+        yield ["- name: Branch name (must be unique)"]
+        yield ["- code: Short code (2-10 characters, must be unique)"]
+        yield ["- phone: Contact phone number (optional)"]
+        yield ["- region_name: Must exactly match existing region"]
+        yield ["- company_name: Must exactly match existing company"]
+        if region_id:
+            yield ["- FILTERED: Only showing branches for selected region"]
+        elif company_id:
+            yield ["- FILTERED: Only showing branches for selected company"]
+        yield []
+        yield ["AVAILABLE REGIONS:"]
+        for region in regions.order_by("company__name", "name").iterator(
+            chunk_size=TEMPLATE_CHUNK_SIZE
+        ):
+            yield [f"- {region.name} ({region.company.name})"]
+
+    return stream_csv(rows(), f'{"_".join(filename_parts)}_template.csv')
 
 
 @login_required
@@ -381,109 +580,97 @@ def import_branches(request):
     """Bulk import branches from CSV"""
     if request.method == "POST" and request.FILES.get("csv_file"):
         csv_file = request.FILES["csv_file"]
-        is_excel = csv_file.name.endswith((".xlsx", ".xls"))
         if not csv_file.name.endswith(".csv"):
             messages.error(request, "Please upload a CSV file")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
         try:
-            decoded_file = csv_file.read().decode("utf-8")
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string)
-            data_rows = list(reader)
+            errors = RowErrors()
+            data_rows = parse_upload(csv_file, errors)
             success_count = 0
-            error_count = 0
-            errors = []
-            with transaction.atomic():
-                for row_num, row in enumerate(data_rows, start=2):
-                    try:
-                        if is_excel:
-                            row = {
-                                k: (str(v) if pd.notna(v) else "")
-                                for k, v in row.items()
-                            }
-                        if not row.get("name") or str(row.get("name", "")).startswith(
-                            "INSTRUCTIONS"
-                        ):
-                            continue
-                        name = str(row["name"]).strip()
-                        code = str(row["code"]).strip()
-                        phone = row.get("phone", "").strip()
-                        region_name = str(row["region_name"]).strip()
-                        company_name = str(row["company_name"]).strip()
-
-                        if not all([name, code, region_name, company_name]):
-                            errors.append(f"Row {row_num}: Missing required fields")
-                            error_count += 1
-                            continue
-
-                        try:
-                            company = Company.objects.get(name__iexact=company_name)
-                        except Company.DoesNotExist:
-                            errors.append(
-                                f"Row {row_num}: Company '{company_name}' not found"
-                            )
-                            error_count += 1
-                            continue
-
-                        try:
-                            region = Region.objects.get(
-                                name__iexact=region_name, company=company
-                            )
-                        except Region.DoesNotExist:
-                            errors.append(
-                                f"Row {row_num}: Region '{region_name}' not found for company '{company_name}'"
-                            )
-                            error_count += 1
-                            continue
-
-                        if Branch.objects.filter(name__iexact=name).exists():
-                            errors.append(
-                                f"Row {row_num}: Branch '{name}' already exists"
-                            )
-                            error_count += 1
-                            continue
-
-                        if Branch.objects.filter(code__iexact=code).exists():
-                            errors.append(
-                                f"Row {row_num}: Code '{code}' already exists"
-                            )
-                            error_count += 1
-                            continue
-
-                        Branch.objects.create(
-                            name=name,
-                            code=code,
-                            phone=phone if phone else None,
-                            region=region,
+            # Validated rows keyed by upper-cased code; file-level duplicates
+            # are caught here, database duplicates by the unique constraints.
+            pending = {}
+            seen_names = set()
+            company_ids = casefold_map(Company.objects.values_list("name", "id"))
+            region_ids = {
+                (company_id, name.casefold()): region_id
+                for region_id, company_id, name in Region.objects.values_list(
+                    "id", "company_id", "name"
+                )
+            }
+            for row_num, row in data_rows:
+                try:
+                    name = row["name"]
+                    code = row["code"]
+                    phone = row.get("phone", "")
+                    region_name = row["region_name"]
+                    company_name = row["company_name"]
+
+                    if not (name and code and region_name and company_name):
+                        errors.add(row_num, "Missing required fields")
+                        continue
+
+                    company_id = company_ids.get(company_name.casefold())
+                    if company_id is None:
+                        errors.add(row_num, f"Company '{company_name}' not found")
+                        continue
+
+                    region_id = region_ids.get((company_id, region_name.casefold()))
+                    if region_id is None:
+                        errors.add(
+                            row_num,
+                            f"Region '{region_name}' not found for company '{company_name}'",
                         )
-                        success_count += 1
+                        continue
 
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                        error_count += 1
+                    if name.upper() in seen_names:
+                        errors.add(row_num, f"Branch '{name}' already exists")
+                        continue
 
-            if success_count > 0:
-                messages.success(
-                    request, f"✅ Successfully imported {success_count} branch(es)"
-                )
-                log_activity(
-                    request.user,
-                    "ORG_BULK_IMPORT",
-                    f"Imported {success_count} branches",
+                    if code.upper() in pending:
+                        errors.add(row_num, f"Code '{code}' already exists")
+                        continue
+
+                    seen_names.add(name.upper())
+                    pending[code.upper()] = (
+                        row_num,
+                        Branch(
+                            name=name,
+                            code=code,
+                            phone=phone if phone else None,
+                            region_id=region_id,
+                        ),
+                    )
+
+                except Exception as e:
+                    errors.add(row_num, str(e))
+
+            success_count, rejected = insert_new_rows(
+                Branch, pending, "code", ["name", "region_id"]
+            )
+            if rejected:
+                taken_names = set(
+                    Branch.objects.annotate(upper_name=Upper("name"))
+                    .filter(upper_name__in=[b.name.upper() for _, b in rejected])
+                    .values_list("upper_name", flat=True)
                 )
+                for row_num, branch in rejected:
+                    if branch.name.upper() in taken_names:
+                        errors.add(row_num, f"Branch '{branch.name}' already exists")
+                    else:
+                        errors.add(row_num, f"Code '{branch.code}' already exists")
 
-            if error_count > 0:
-                messages.warning(request, f"⚠️ {error_count} row(s) failed")
-                for error in errors[:10]:
-                    messages.error(request, error)
+            report_import_results(
+                request, success_count, errors, "branch(es)", "branches"
+            )
 
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
 
         except Exception as e:
             messages.error(request, f"Error processing CSV: {str(e)}")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
 
-    return redirect("import_organizations")
+    return redirect("organization:import_organizations")
 
 
 # ============================================
@@ -500,55 +687,70 @@ def download_departments_template(request):
     region_id = request.GET.get("region")
     branch_id = request.GET.get("branch")
 
-    response = HttpResponse(content_type="text/csv")
-
     # Filter branches based on parameters
     branches = Branch.objects.select_related("region__company").all()
     filename_parts = ["departments"]
 
     if branch_id:
         branches = branches.filter(id=branch_id)
-        if branches.exists():
-            filename_parts.append(branches.first().name.replace(" ", "_"))
     elif region_id:
         branches = branches.filter(region_id=region_id)
-        region = Region.objects.filter(id=region_id).first()
-        if region:
-            filename_parts.append(region.name.replace(" ", "_"))
     elif company_id:
         branches = branches.filter(region__company_id=company_id)
-        company = Company.objects.filter(id=company_id).first()
-        if company:
-            filename_parts.append(company.name.replace(" ", "_"))
-
-    response["Content-Disposition"] = (
-        f'attachment; filename="{"_".join(filename_parts)}_template.csv"'
-    )
 
-    writer = csv.writer(response)
-    writer.writerow(["name", "branch_name"])
-    # Single example row
-    if branches.exists():
-        b = branches.first()
-        writer.writerow(["DemoDepartment", b.name])
-    else:
-        writer.writerow(["DemoDepartment", "DemoBranch"])
-
-    writer.writerow([])
-    writer.writerow(["INSTRUCTIONS:"])
-    writer.writerow(["- name: Department name"])
-    writer.writerow(["- branch_name: Must exactly match existing branch"])
-    writer.writerow(["- Same department name can exist in multiple branches"])
+    # Fetched once: fills the example row and names a filtered download
+    example_branch = branches.first()
     if branch_id:
-        writer.writerow([f"- FILTERED: Only showing departments for selected branch"])
+        if example_branch:
+            filename_parts.append(example_branch.name.replace(" ", "_"))
     elif region_id:
-        writer.writerow([f"- FILTERED: Only showing departments for selected region"])
+        region = (
+            example_branch.region
+            if example_branch
+            else Region.objects.filter(id=region_id).first()
+        )
+        if region:
+            filename_parts.append(region.name.replace(" ", "_"))
     elif company_id:
-        writer.writerow([f"- FILTERED: Only showing departments for selected company"])
-    writer.writerow([])
-    writer.writerow(["AVAILABLE BRANCHES (omitted for brevity)"])
+        company = (
+            example_branch.region.company
+            if example_branch
+            else Company.objects.filter(id=company_id).first()
+        )
+        if company:
+            filename_parts.append(company.name.replace(" ", "_"))
 
-    return response
+    def rows():
+        yield ["name", "branch_name"]
+        # Single example row
+        b = example_branch
+        if b:
+            yield ["DemoDepartment", b.name]
+        else:
+            yield ["DemoDepartment", "DemoBranch"]
+
+        yield []
+        yield ["INSTRUCTIONS:"]
+        yield ["- name: Department name"]
+        yield ["- branch_name: Must exactly match existing branch"]
+        yield ["- Same department name can exist in multiple branches"]
+        if branch_id:
+            yield ["- FILTERED: Only showing departments for selected branch"]
+        elif region_id:
+            yield ["- FILTERED: Only showing departments for selected region"]
+        elif company_id:
+            yield ["- FILTERED: Only showing departments for selected company"]
+        yield []
+        yield ["AVAILABLE BRANCHES:"]
+        for branch in branches.order_by(
+            "region__company__name", "region__name", "name"
+        ).iterator(chunk_size=TEMPLATE_CHUNK_SIZE):
+            yield [
+                f"- {branch.name} ({branch.region.name}, "
+                f"{branch.region.company.name})"
+            ]
+
+    return stream_csv(rows(), f'{"_".join(filename_parts)}_template.csv')
 
 
 @login_required
@@ -557,84 +759,69 @@ def import_departments(request):
     """Bulk import departments from CSV"""
     if request.method == "POST" and request.FILES.get("csv_file"):
         csv_file = request.FILES["csv_file"]
-        is_excel = csv_file.name.endswith((".xlsx", ".xls"))
         if not csv_file.name.endswith(".csv"):
             messages.error(request, "Please upload a CSV file")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
         try:
-            decoded_file = csv_file.read().decode("utf-8")
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string)
-            data_rows = list(reader)
+            errors = RowErrors()
+            data_rows = parse_upload(csv_file, errors)
             success_count = 0
-            error_count = 0
-            errors = []
-            with transaction.atomic():
-                for row_num, row in enumerate(data_rows, start=2):
-                    try:
-                        if is_excel:
-                            row = {
-                                k: (str(v) if pd.notna(v) else "")
-                                for k, v in row.items()
-                            }
-                        if not row.get("name") or str(row.get("name", "")).startswith(
-                            "INSTRUCTIONS"
-                        ):
-                            continue
-                        name = str(row["name"]).strip()
-                        branch_name = str(row["branch_name"]).strip()
-                        if not all([name, branch_name]):
-                            errors.append(f"Row {row_num}: Missing required fields")
-                            error_count += 1
-                            continue
-
-                        try:
-                            branch = Branch.objects.get(name__iexact=branch_name)
-                        except Branch.DoesNotExist:
-                            errors.append(
-                                f"Row {row_num}: Branch '{branch_name}' not found"
-                            )
-                            error_count += 1
-                            continue
-
-                        if Department.objects.filter(
-                            name__iexact=name, branch=branch
-                        ).exists():
-                            errors.append(
-                                f"Row {row_num}: Department '{name}' already exists in branch '{branch_name}'"
-                            )
-                            error_count += 1
-                            continue
-
-                        Department.objects.create(name=name, branch=branch)
-                        success_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                        error_count += 1
-
-            if success_count > 0:
-                messages.success(
-                    request, f"✅ Successfully imported {success_count} department(s)"
-                )
-                log_activity(
-                    request.user,
-                    "ORG_BULK_IMPORT",
-                    f"Imported {success_count} departments",
+            # Load existing (branch, name) pairs once; rows are checked
+            # against the set
+            existing_departments = {
+                (branch_id, name.casefold())
+                for branch_id, name in Department.objects.values_list(
+                    "branch_id", "name"
                 )
+            }
+            branch_ids = casefold_map(Branch.objects.values_list("name", "id"))
+            to_create = []
+            for row_num, row in data_rows:
+                try:
+                    name = row["name"]
+                    branch_name = row["branch_name"]
+                    if not (name and branch_name):
+                        errors.add(row_num, "Missing required fields")
+                        continue
+
+                    branch_id = branch_ids.get(branch_name.casefold())
+                    if branch_id is None:
+                        errors.add(row_num, f"Branch '{branch_name}' not found")
+                        continue
+
+                    if (branch_id, name.casefold()) in existing_departments:
+                        errors.add(
+                            row_num,
+                            f"Department '{name}' already exists in branch '{branch_name}'",
+                        )
+                        continue
 
-            if error_count > 0:
-                messages.warning(request, f"⚠️ {error_count} row(s) failed")
-                for error in errors[:10]:
-                    messages.error(request, error)
+                    to_create.append(Department(name=name, branch_id=branch_id))
+                    existing_departments.add((branch_id, name.casefold()))
 
-            return redirect("import_organizations")
+                except Exception as e:
+                    errors.add(row_num, str(e))
+
+            # All batches or none, like the other importers' inserts
+            with transaction.atomic():
+                bulk_insert(Department, to_create)
+            success_count = len(to_create)
+
+            report_import_results(
+                request,
+                success_count,
+                errors,
+                "department(s)",
+                "departments",
+            )
+
+            return redirect("organization:import_organizations")
 
         except Exception as e:
             messages.error(request, f"Error processing CSV: {str(e)}")
-            return redirect("import_organizations")
+            return redirect("organization:import_organizations")
 
-    return redirect("import_organizations")
+    return redirect("organization:import_organizations")
 
 
 # ============================================
@@ -645,17 +832,34 @@ def import_departments(request):
 @login_required
 def import_organizations(request):
     """Main page for bulk importing all organization entities"""
-    context = {
-        "companies_count": Company.objects.count(),
-        "regions_count": Region.objects.count(),
-        "branches_count": Branch.objects.count(),
-        "departments_count": Department.objects.count(),
-        "companies": Company.objects.all().order_by("name"),
-        "regions": Region.objects.select_related("company")
-        .all()
-        .order_by("company__name", "name"),
-        "branches": Branch.objects.select_related("region__company")
-        .all()
-        .order_by("region__company__name", "region__name", "name"),
+    # All four totals in one round-trip, as independent COUNT(*) subqueries
+    counted = {
+        "companies_count": Company,
+        "regions_count": Region,
+        "branches_count": Branch,
+        "departments_count": Department,
     }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT "
+            + ", ".join(
+                f"(SELECT COUNT(*) FROM {connection.ops.quote_name(m._meta.db_table)})"
+                for m in counted.values()
+            )
+        )
+        context = dict(zip(counted, cursor.fetchone()))
+
+    # Lists feed the template filter dropdowns, so they stay complete but only
+    # load the columns those options render
+    context.update(
+        {
+            "companies": Company.objects.only("id", "name").order_by("name"),
+            "regions": Region.objects.select_related("company")
+            .only("id", "name", "company__id", "company__name")
+            .order_by("company__name", "name"),
+            "branches": Branch.objects.select_related("region__company")
+            .only("id", "name", "region__id", "region__name", "region__company__id")
+            .order_by("region__company__name", "region__name", "name"),
+        }
+    )
     return render(request, "organization/bulk_import.html", context)
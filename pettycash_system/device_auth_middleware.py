@@ -3,47 +3,78 @@ Device Authentication Middleware
 Restricts login to whitelisted devices only
 """
 
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import requests
 from django.contrib import messages
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.shortcuts import redirect
 from django.urls import reverse
-
-from accounts.models_device import DeviceAccessAttempt, WhitelistedDevice
-from settings_manager.models import get_setting
+from django.utils import timezone
+
+from accounts.models_device import (
+    DeviceAccessAttempt,
+    WhitelistedDevice,
+    get_whitelisted_user_agents,
+)
+from settings_manager.models import get_cached_setting, is_enabled
+
+# Geolocation lookups run off the request thread and share pooled connections
+GEO_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="geolocation")
+GEO_SESSION = requests.Session()
+
+# Seconds between last_used_at updates for the same device
+DEVICE_TOUCH_INTERVAL = 300
+
+# (pattern, label) pairs checked in order; the first match wins. Mobile
+# tokens come before desktop ones because iOS user agents also contain
+# "Mac OS X" and Android ones contain "Linux".
+OS_PATTERNS = (
+    (re.compile(r"Windows NT 1[01]"), "Windows 10/11"),
+    (re.compile(r"Windows NT 6"), "Windows 7/8"),
+    (re.compile(r"Windows"), "Windows"),
+    (re.compile(r"iPhone|iPad"), "iOS"),
+    (re.compile(r"Macintosh|Mac OS X"), "macOS"),
+    (re.compile(r"Android"), "Android"),
+    (re.compile(r"Linux"), "Linux"),
+)
+
+# Edge and Chrome user agents also carry "Chrome"/"Safari", so order matters
+BROWSER_PATTERNS = (
+    (re.compile(r"Edg"), "Edge"),
+    (re.compile(r"Chrome"), "Chrome"),
+    (re.compile(r"Firefox"), "Firefox"),
+    (re.compile(r"Safari"), "Safari"),
+)
+
+
+def match_label(patterns, user_agent):
+    """Return the label of the first pattern found in the user agent"""
+    for pattern, label in patterns:
+        if pattern.search(user_agent):
+            return label
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_user_agent(user_agent):
+    """
+    Build a device name such as "Windows 10/11 - Chrome" from a user agent.
+    Cached because the same few browsers account for nearly every request.
+    """
+    os_name = match_label(OS_PATTERNS, user_agent) or "Unknown Device"
+    browser = match_label(BROWSER_PATTERNS, user_agent)
+    return f"{os_name} - {browser}" if browser else os_name
 
 
 def get_device_info(request):
     """Extract device information from request"""
     user_agent = request.META.get("HTTP_USER_AGENT", "")
-
-    # Parse device name from user agent
-    device_name = "Unknown Device"
-    if "Windows" in user_agent:
-        if "Windows NT 10" in user_agent or "Windows NT 11" in user_agent:
-            device_name = "Windows 10/11"
-        elif "Windows NT 6" in user_agent:
-            device_name = "Windows 7/8"
-        else:
-            device_name = "Windows"
-    elif "Macintosh" in user_agent or "Mac OS X" in user_agent:
-        device_name = "macOS"
-    elif "Linux" in user_agent:
-        device_name = "Linux"
-    elif "Android" in user_agent:
-        device_name = "Android"
-    elif "iPhone" in user_agent or "iPad" in user_agent:
-        device_name = "iOS"
-
-    # Add browser info
-    if "Chrome" in user_agent and "Edg" not in user_agent:
-        device_name += " - Chrome"
-    elif "Edg" in user_agent:
-        device_name += " - Edge"
-    elif "Firefox" in user_agent:
-        device_name += " - Firefox"
-    elif "Safari" in user_agent and "Chrome" not in user_agent:
-        device_name += " - Safari"
-
-    return {"device_name": device_name, "user_agent": user_agent}
+    return {"device_name": parse_user_agent(user_agent), "user_agent": user_agent}
 
 
 def get_client_ip(request):
@@ -56,30 +87,45 @@ def get_client_ip(request):
     return ip
 
 
+@lru_cache(maxsize=2048)
+def lookup_location(ip_address):
+    """
+    Query the geolocation API for an IP address.
+    Only successful lookups are cached; failures raise and are retried next time.
+    """
+    response = GEO_SESSION.get(f"http://ip-api.com/json/{ip_address}", timeout=2)
+    response.raise_for_status()
+    data = response.json()
+    if data.get("status") != "success":
+        raise ValueError(f"Geolocation failed for {ip_address}")
+    city = data.get("city", "")
+    region = data.get("regionName", "")
+    country = data.get("country", "")
+    return f"{city}, {region}, {country}" if city else f"{region}, {country}"
+
+
 def get_location(ip_address):
     """Get location from IP address using geolocation API"""
-    enable_geolocation = get_setting("ENABLE_ACTIVITY_GEOLOCATION", "true")
+    enable_geolocation = get_cached_setting("ENABLE_ACTIVITY_GEOLOCATION", "true")
 
-    if enable_geolocation != "true":
+    if not is_enabled(enable_geolocation):
         return ""
 
     try:
-        import requests
-
-        response = requests.get(f"http://ip-api.com/json/{ip_address}", timeout=2)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("status") == "success":
-                city = data.get("city", "")
-                region = data.get("regionName", "")
-                country = data.get("country", "")
-                return (
-                    f"{city}, {region}, {country}" if city else f"{region}, {country}"
-                )
-    except:
-        pass
+        return lookup_location(ip_address)
+    except (requests.RequestException, ValueError):
+        return ""
 
-    return ""
+
+def locate_access_attempt(attempt_id, ip_address):
+    """Fill in the location of a logged attempt; runs on GEO_EXECUTOR"""
+    try:
+        location = get_location(ip_address)
+        if location:
+            DeviceAccessAttempt.objects.filter(pk=attempt_id).update(location=location)
+    finally:
+        # Worker threads must not hold on to their own DB connections
+        connection.close()
 
 
 class DeviceAuthenticationMiddleware:
@@ -92,7 +138,7 @@ class DeviceAuthenticationMiddleware:
         self.get_response = get_response
 
         # URLs that should always be accessible
-        self.exempt_urls = [
+        self.exempt_urls = (
             "/accounts/login/",
             "/accounts/logout/",
             "/accounts/signup/",
@@ -101,67 +147,70 @@ class DeviceAuthenticationMiddleware:
             "/static/",
             "/media/",
             "/admin/login/",
-        ]
+        )
 
     def __call__(self, request):
-        # Check if device whitelist enforcement is enabled
-        enforce_device_whitelist = get_setting("ENFORCE_DEVICE_WHITELIST", "false")
-
-        if enforce_device_whitelist == "true" and request.user.is_authenticated:
-            # Skip exempt URLs
-            if not self.is_exempt_url(request.path):
-                # Check if device is whitelisted
-                if not self.is_device_whitelisted(request):
-                    # Log blocked attempt
-                    self.log_blocked_attempt(request)
-
-                    # Logout user and redirect to blocked page
-                    from django.contrib.auth import logout
-
-                    logout(request)
-                    return redirect("device_blocked")
+        # Cheapest checks first: exempt paths never load the session user, and
+        # anonymous requests never need the enforcement setting
+        if (
+            not self.is_exempt_url(request.path)
+            and request.user.is_authenticated
+            and is_enabled(get_cached_setting("ENFORCE_DEVICE_WHITELIST", "false"))
+        ):
+            # Check if device is whitelisted
+            if not self.is_device_whitelisted(request):
+                # Log blocked attempt
+                self.log_blocked_attempt(request)
+
+                # Logout user and redirect to blocked page
+                from django.contrib.auth import logout
+
+                logout(request)
+                return redirect("accounts:device_blocked")
 
         response = self.get_response(request)
         return response
 
     def is_exempt_url(self, path):
         """Check if URL should bypass device check"""
-        for exempt in self.exempt_urls:
-            if path.startswith(exempt):
-                return True
-        return False
+        return path.startswith(self.exempt_urls)
 
     def is_device_whitelisted(self, request):
         """Check if current device is whitelisted and active"""
-        device_info = get_device_info(request)
-        ip_address = get_client_ip(request)
-        user_agent = device_info["user_agent"]
+        user_agent = request.META.get("HTTP_USER_AGENT", "")
 
-        # Check if exact device exists and is active
-        device = WhitelistedDevice.objects.filter(
-            user=request.user, user_agent=user_agent, is_active=True
-        ).first()
+        if user_agent not in get_whitelisted_user_agents(request.user.pk):
+            return False
 
-        if device:
-            # Update last used timestamp
-            device.save()  # This triggers auto_now on last_used_at
-            return True
+        # Update last used timestamp, at most once per interval per device
+        digest = hashlib.sha256(user_agent.encode()).hexdigest()
+        touch_key = f"device_touched:{request.user.pk}:{digest}"
+        if cache.add(touch_key, True, DEVICE_TOUCH_INTERVAL):
+            WhitelistedDevice.objects.filter(
+                user=request.user, user_agent=user_agent, is_active=True
+            ).update(last_used_at=timezone.now())
 
-        return False
+        return True
 
     def log_blocked_attempt(self, request):
         """Log blocked device access attempt"""
         device_info = get_device_info(request)
         ip_address = get_client_ip(request)
-        location = get_location(ip_address)
 
-        DeviceAccessAttempt.objects.create(
+        attempt = DeviceAccessAttempt.objects.create(
             user=request.user,
             ip_address=ip_address,
             device_name=device_info["device_name"],
             user_agent=device_info["user_agent"],
-            location=location,
             was_allowed=False,
             reason="Device not whitelisted",
             request_path=request.path,
         )
+
+        # The geolocation API can take seconds; look it up in the background
+        if is_enabled(get_cached_setting("ENABLE_ACTIVITY_GEOLOCATION", "true")):
+            transaction.on_commit(
+                lambda: GEO_EXECUTOR.submit(
+                    locate_access_attempt, attempt.pk, ip_address
+                )
+            )
@@ -3,13 +3,67 @@ IP Whitelist Middleware for Security
 Restricts access based on IP addresses when enabled
 """
 
+from functools import lru_cache
 from ipaddress import ip_address, ip_network
 
 from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpResponseForbidden
 from django.urls import reverse
+from django.utils.html import escape
+
+from settings_manager.models import get_cached_setting, is_enabled
+from settings_manager.views import log_activity
+
+# Blocked-request log entries written per client IP per window (seconds)
+SECURITY_LOG_LIMIT = 10
+SECURITY_LOG_WINDOW = 60
+
+# Static parts of the 403 page, encoded once; only the client IP varies
+FORBIDDEN_PAGE_START = """
+<html>
+<head><title>Access Denied</title></head>
+<body style="font-family: Arial; text-align: center; margin-top: 100px;">
+    <h1>🚫 Access Denied</h1>
+    <p>Your IP address (""".encode()
+FORBIDDEN_PAGE_END = """) is not authorized to access this system.</p>
+    <p>Please contact your system administrator.</p>
+    <hr>
+    <small>IP Whitelist Security Policy Enforced</small>
+</body>
+</html>
+""".encode()
+
+
+@lru_cache(maxsize=8)
+def parse_allowed_ips(allowed_ips_str):
+    """
+    Parse ALLOWED_IP_ADDRESSES into a prefix table for fast matching.
+    Entries are grouped by IP version and netmask, each group holding a
+    frozenset of network ints (single IPs are full-length networks), so
+    a lookup costs one set probe per distinct prefix length however long
+    the list is. Invalid entries are skipped. Cached per distinct
+    setting value so requests never re-parse it.
+    """
+    groups = {}
+    for allowed in allowed_ips_str.split(","):
+        allowed = allowed.strip()
+        if not allowed:
+            continue
+        try:
+            # Single IPs parse as /32 (or /128) networks
+            network = ip_network(allowed, strict=False)
+        except ValueError:
+            # Invalid IP/network format, skip
+            continue
+        key = (network.version, int(network.netmask))
+        groups.setdefault(key, set()).add(int(network.network_address))
 
-from settings_manager.models import get_setting
+    # Longest prefixes first: exact addresses are the common match
+    table = {4: [], 6: []}
+    for (version, mask), nets in sorted(groups.items(), key=lambda g: -g[0][1]):
+        table[version].append((mask, frozenset(nets)))
+    return {version: tuple(entries) for version, entries in table.items()}
 
 
 class IPWhitelistMiddleware:
@@ -24,39 +78,28 @@ class IPWhitelistMiddleware:
         self.get_response = get_response
 
         # URLs that should always be accessible (even when IP blocked)
-        self.exempt_urls = [
+        self.exempt_urls = (
             "/accounts/login/",
             "/static/",
             "/media/",
             "/admin/login/",
-        ]
+        )
 
     def __call__(self, request):
-        # Check if IP whitelisting is enabled
-        ip_whitelist_enabled = get_setting("ENABLE_IP_WHITELIST", "false")
-
-        if ip_whitelist_enabled == "true":
+        # Exempt URLs (login, static, media) skip the setting lookup entirely
+        if not self.is_exempt_url(request.path) and is_enabled(
+            get_cached_setting("ENABLE_IP_WHITELIST", "false")
+        ):
             # Get client IP address
             client_ip = self.get_client_ip(request)
 
-            # Check if URL is exempt
-            if not self.is_exempt_url(request.path):
-                # Check if IP is whitelisted
-                if not self.is_ip_allowed(client_ip):
-                    return HttpResponseForbidden(
-                        f"""
-                        <html>
-                        <head><title>Access Denied</title></head>
-                        <body style="font-family: Arial; text-align: center; margin-top: 100px;">
-                            <h1>🚫 Access Denied</h1>
-                            <p>Your IP address ({client_ip}) is not authorized to access this system.</p>
-                            <p>Please contact your system administrator.</p>
-                            <hr>
-                            <small>IP Whitelist Security Policy Enforced</small>
-                        </body>
-                        </html>
-                        """
-                    )
+            # Check if IP is whitelisted
+            if not self.is_ip_allowed(client_ip):
+                return HttpResponseForbidden(
+                    FORBIDDEN_PAGE_START
+                    + escape(client_ip).encode()
+                    + FORBIDDEN_PAGE_END
+                )
 
         response = self.get_response(request)
         return response
@@ -80,10 +123,7 @@ class IPWhitelistMiddleware:
         Check if URL should bypass IP whitelist.
         Allows login page and static files.
         """
-        for exempt in self.exempt_urls:
-            if path.startswith(exempt):
-                return True
-        return False
+        return path.startswith(self.exempt_urls)
 
     def is_ip_allowed(self, client_ip):
         """
@@ -96,39 +136,24 @@ class IPWhitelistMiddleware:
             10.0.0.0/8 - Large network
         """
         # Get allowed IPs from settings
-        allowed_ips_str = get_setting("ALLOWED_IP_ADDRESSES", "")
+        allowed_ips_str = get_cached_setting("ALLOWED_IP_ADDRESSES", "")
 
         if not allowed_ips_str:
             # If no IPs configured, deny all (fail-secure)
             return False
 
-        # Parse allowed IPs
-        allowed_ips = [ip.strip() for ip in allowed_ips_str.split(",") if ip.strip()]
-
         try:
             client = ip_address(client_ip)
-
-            for allowed in allowed_ips:
-                try:
-                    # Check if it's a network range (CIDR notation)
-                    if "/" in allowed:
-                        network = ip_network(allowed, strict=False)
-                        if client in network:
-                            return True
-                    else:
-                        # Single IP address
-                        if client == ip_address(allowed):
-                            return True
-                except ValueError:
-                    # Invalid IP/network format, skip
-                    continue
-
-            return False
-
         except ValueError:
             # Invalid client IP format
             return False
 
+        client_int = int(client)
+        return any(
+            client_int & mask in nets
+            for mask, nets in parse_allowed_ips(allowed_ips_str)[client.version]
+        )
+
 
 class SecurityLoggingMiddleware:
     """
@@ -144,25 +169,43 @@ class SecurityLoggingMiddleware:
 
         # Log blocked access attempts (403 responses)
         if response.status_code == 403:
-            from settings_manager.views import log_activity
-
             client_ip = self.get_client_ip(request)
             path = request.path
 
-            # Log the blocked attempt
-            log_activity(
-                user=request.user if request.user.is_authenticated else None,
-                action="system",
-                content_type="Security",
-                description=f"Blocked access attempt to {path}",
-                changes={"ip": client_ip, "path": path, "reason": "IP not whitelisted"},
-                success=False,
-                error_message="IP address not in whitelist",
-                request=request,
-            )
+            # Log the blocked attempt, unless this IP is flooding us
+            if self.should_log(client_ip):
+                # Requests rejected before AuthenticationMiddleware have no user
+                user = getattr(request, "user", None)
+                log_activity(
+                    user=user if user and user.is_authenticated else None,
+                    action="system",
+                    content_type="Security",
+                    description=f"Blocked access attempt to {path}",
+                    changes={
+                        "ip": client_ip,
+                        "path": path,
+                        "reason": "IP not whitelisted",
+                    },
+                    success=False,
+                    error_message="IP address not in whitelist",
+                    request=request,
+                )
 
         return response
 
+    def should_log(self, client_ip):
+        """
+        Allow SECURITY_LOG_LIMIT entries per IP per SECURITY_LOG_WINDOW.
+        Keeps a 403 flood from turning into a flood of log writes.
+        """
+        key = f"security_log:{client_ip}"
+        cache.add(key, 0, SECURITY_LOG_WINDOW)
+        try:
+            return cache.incr(key) <= SECURITY_LOG_LIMIT
+        except ValueError:
+            # Window expired between add() and incr()
+            return True
+
     def get_client_ip(self, request):
         """Extract client IP address from request."""
         x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
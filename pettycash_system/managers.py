@@ -7,7 +7,7 @@ data isolation between different companies.
 
 from django.db import models
 
-from pettycash_system.middleware import get_current_company
+from pettycash_system.middleware import get_current_company_id
 
 
 class CompanyQuerySet(models.QuerySet):
@@ -21,9 +21,9 @@ class CompanyQuerySet(models.QuerySet):
 
     def current_company(self):
         """Filter by the current request's company (from middleware)."""
-        company = get_current_company()
-        if company:
-            return self.filter(company=company)
+        company_id = get_current_company_id()
+        if company_id:
+            return self.filter(company_id=company_id)
         return self  # If no company context, return all (for superusers)
 
 
@@ -54,9 +54,9 @@ class RequisitionQuerySet(models.QuerySet):
 
     def current_company(self):
         """Filter by current request's company."""
-        company = get_current_company()
-        if company:
-            return self.filter(requested_by__company=company)
+        company_id = get_current_company_id()
+        if company_id:
+            return self.filter(requested_by__company_id=company_id)
         return self  # Superuser sees all
 
 
@@ -87,9 +87,9 @@ class PaymentQuerySet(models.QuerySet):
 
     def current_company(self):
         """Filter by current request's company."""
-        company = get_current_company()
-        if company:
-            return self.filter(requisition__requested_by__company=company)
+        company_id = get_current_company_id()
+        if company_id:
+            return self.filter(requisition__requested_by__company_id=company_id)
         return self  # Superuser sees all
 
 
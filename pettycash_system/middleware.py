@@ -3,32 +3,41 @@ Multi-Tenancy Middleware
 Sets company context for each request based on authenticated user.
 """
 
-from threading import local
+from contextvars import ContextVar
 
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 
-# Thread-local storage for current company context
-_thread_locals = local()
+# Context-local storage for current company context (thread- and async-safe)
+_current_company = ContextVar("current_company", default=None)
+_current_company_id = ContextVar("current_company_id", default=None)
+_current_user = ContextVar("current_user", default=None)
 
 
 def get_current_company():
-    """Get the current company from thread-local storage."""
-    return getattr(_thread_locals, "company", None)
+    """Get the current company from context-local storage."""
+    return _current_company.get()
+
+
+def get_current_company_id():
+    """Get the current company's id without loading the company."""
+    return _current_company_id.get()
 
 
 def get_current_user():
-    """Get the current user from thread-local storage."""
-    return getattr(_thread_locals, "user", None)
+    """Get the current user from context-local storage."""
+    return _current_user.get()
 
 
 def set_current_company(company):
-    """Set the current company in thread-local storage (for testing)."""
-    _thread_locals.company = company
+    """Set the current company in context-local storage (for testing)."""
+    _current_company.set(company)
+    _current_company_id.set(company.pk if company else None)
 
 
 def set_current_user(user):
-    """Set the current user in thread-local storage (for testing)."""
-    _thread_locals.user = user
+    """Set the current user in context-local storage (for testing)."""
+    _current_user.set(user)
 
 
 class CompanyMiddleware(MiddlewareMixin):
@@ -40,21 +49,41 @@ class CompanyMiddleware(MiddlewareMixin):
     """
 
     def process_request(self, request):
-        """Store user and their company in thread-local storage."""
+        """
+        Store user and their company in context-local storage.
+        The tokens are kept on the request so the previous values can be
+        restored once the response (or an exception) leaves this middleware.
+        """
         user = getattr(request, "user", None)
 
         if user and user.is_authenticated:
-            _thread_locals.user = user
-            _thread_locals.company = user.company
+            company_id = user.company_id
+            # Only fetched if something actually needs the Company row
+            company = SimpleLazyObject(lambda: user.company) if company_id else None
         else:
-            _thread_locals.user = None
-            _thread_locals.company = None
+            user = company_id = company = None
 
-    def process_response(self, request, response):
-        """Clean up thread-local storage after request."""
-        if hasattr(_thread_locals, "user"):
-            del _thread_locals.user
-        if hasattr(_thread_locals, "company"):
-            del _thread_locals.company
+        request._company_context_tokens = (
+            _current_user.set(user),
+            _current_company_id.set(company_id),
+            _current_company.set(company),
+        )
 
+    def process_response(self, request, response):
+        """Clean up context-local storage after request."""
+        self._reset_context(request)
         return response
+
+    def process_exception(self, request, exception):
+        """Clean up context-local storage when the view raises."""
+        self._reset_context(request)
+
+    @staticmethod
+    def _reset_context(request):
+        tokens = request.__dict__.pop("_company_context_tokens", None)
+        if tokens is None:
+            return
+        user_token, company_id_token, company_token = tokens
+        _current_user.reset(user_token)
+        _current_company_id.reset(company_id_token)
+        _current_company.reset(company_token)
@@ -6,15 +6,30 @@ import os
 from pathlib import Path
 
 import dj_database_url
-from dotenv import load_dotenv
 
 # ---------------------------------------------------------------------
 # BASE DIR
 # ---------------------------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Load environment variables from .env file
-load_dotenv(BASE_DIR / ".env")
+# Load environment variables from .env file (development only; deployments
+# set real environment variables, so python-dotenv is not even imported)
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
+
+
+def _csv_env(key, default):
+    """Comma-separated environment value as a tuple; entries trimmed, blanks dropped"""
+    items = os.environ.get(key, default).split(",")
+    return tuple(item.strip() for item in items if item.strip())
+
+
+def _bool_env(key, default):
+    """Boolean environment value; 1/true/yes/on in any case count as true"""
+    return os.environ.get(key, default).strip().lower() in {"1", "true", "yes", "on"}
+
 
 # ---------------------------------------------------------------------
 # SECURITY
@@ -23,20 +38,29 @@ SECRET_KEY = os.environ.get(
     "SECRET_KEY",
     "django-insecure-change-this-in-production-to-a-secure-random-key-with-at-least-50-characters",
 )
-DEBUG = os.environ.get("DEBUG", "True") == "True"
-ALLOWED_HOSTS = os.environ.get(
+# Off unless explicitly enabled: with DEBUG on, Django keeps every SQL query
+# in connection.queries, so long-running workers grow without bound
+DEBUG = _bool_env("DEBUG", "False")
+
+# Render and Railway set these on every deploy; never serve DEBUG pages there
+if DEBUG and (os.environ.get("RENDER") or os.environ.get("RAILWAY_ENVIRONMENT")):
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured("DEBUG must be off in production deployments.")
+
+ALLOWED_HOSTS = _csv_env(
     "ALLOWED_HOSTS", "localhost,127.0.0.1,.railway.app,.render.com,.onrender.com"
-).split(",")
+)
 
 # Site URL for email invitations
 SITE_URL = os.environ.get("SITE_URL", "http://localhost:8000")
 SITE_NAME = os.environ.get("SITE_NAME", "Petty Cash System")
 
 # CSRF & Security for production
-CSRF_TRUSTED_ORIGINS = os.environ.get(
+CSRF_TRUSTED_ORIGINS = _csv_env(
     "CSRF_TRUSTED_ORIGINS",
     "http://localhost:8000,https://localhost:8000,http://127.0.0.1:8000,https://*.onrender.com",
-).split(",")
+)
 
 # Security settings (enabled in production)
 SECURE_SSL_REDIRECT = False
@@ -86,20 +110,22 @@ INSTALLED_APPS = [
 # ---------------------------------------------------------------------
 # MIDDLEWARE
 # ---------------------------------------------------------------------
+# Order matters: cheap rejections run before sessions/auth touch the DB
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # For static files in production
+    "django.middleware.gzip.GZipMiddleware",  # Compress dynamic HTML/JSON (WhiteNoise serves static files pre-compressed)
+    "pettycash_system.ip_whitelist_middleware.SecurityLoggingMiddleware",  # Log security events (wraps the IP check to see its 403s)
+    "pettycash_system.ip_whitelist_middleware.IPWhitelistMiddleware",  # IP whitelist security (no session or user needed)
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "system_maintenance.middleware.MaintenanceModeMiddleware",  # Block access during maintenance
-    "pettycash_system.ip_whitelist_middleware.IPWhitelistMiddleware",  # IP whitelist security
     "pettycash_system.device_auth_middleware.DeviceAuthenticationMiddleware",  # Device whitelist enforcement
     "pettycash_system.middleware.CompanyMiddleware",  # Multi-tenancy: Set company context
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "pettycash_system.ip_whitelist_middleware.SecurityLoggingMiddleware",  # Log security events
 ]
 
 # ---------------------------------------------------------------------
@@ -117,7 +143,6 @@ TEMPLATES = [
         "APP_DIRS": True,  # automatically look in app templates
         "OPTIONS": {
             "context_processors": [
-                "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
@@ -134,15 +159,89 @@ WSGI_APPLICATION = "pettycash_system.wsgi.application"
 # ---------------------------------------------------------------------
 # DATABASE
 # ---------------------------------------------------------------------
-# Use DATABASE_URL from environment or fallback to Supabase connection string
+# DATABASE_URL is required; there is deliberately no credential fallback here
+# Persistent connections save the TCP/TLS/auth handshake on each request.
+# Point DATABASE_URL at a PgBouncer (or the Supabase pooler) so the number of
+# workers, not requests, bounds the connections held open. Keep it under the
+# pooler's idle timeout (Supabase closes idle clients well before 600s) so
+# the health check never finds a dead connection mid-request.
+CONN_MAX_AGE = int(os.environ.get("CONN_MAX_AGE", "60"))
+
 DATABASES = {
     "default": dj_database_url.config(
         default=os.environ["DATABASE_URL"],
-        conn_max_age=0,  # Disable persistent connections to avoid pool exhaustion
+        conn_max_age=CONN_MAX_AGE,
         conn_health_checks=True,
     )
 }
 
+# Transaction-mode poolers hand each transaction to any server connection,
+# which breaks the named cursors Django uses for QuerySet.iterator()
+DB_TRANSACTION_POOLING = _bool_env("DB_TRANSACTION_POOLING", "False")
+if DB_TRANSACTION_POOLING:
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    DB_OPTIONS = DATABASES["default"].setdefault("OPTIONS", {})
+
+    # psycopg 3 prepares a query server-side once it has run 5 times on a
+    # connection. Prepared statements are tied to one server connection too,
+    # so they stay off behind a transaction-mode pooler.
+    if DB_TRANSACTION_POOLING:
+        DB_OPTIONS["prepare_threshold"] = None
+
+    # DB_POOL_MAX_SIZE enables psycopg 3's pool in each worker (useful with
+    # threaded workers). The pool replaces persistent connections and checks
+    # connections itself, so CONN_MAX_AGE and health checks are turned off.
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "0"))
+    if DB_POOL_MAX_SIZE:
+        DB_OPTIONS["pool"] = {
+            "min_size": 1,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": 10,
+        }
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["CONN_HEALTH_CHECKS"] = False
+
+# New connections are logged by settings_manager.signals; set
+# DB_CONNECTION_LOG_LEVEL=INFO to watch for reconnect churn
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "settings_manager.signals": {
+            "handlers": ["console"],
+            "level": os.environ.get("DB_CONNECTION_LOG_LEVEL", "WARNING"),
+        },
+    },
+}
+
+# ---------------------------------------------------------------------
+# CACHE
+# ---------------------------------------------------------------------
+# With REDIS_URL set, cached settings, device whitelists and rate-limit
+# counters are shared by every worker and invalidated for all of them at
+# once. Without it each process keeps its own in-memory cache.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "KEY_PREFIX": "pc",
+        }
+    }
+    # Sessions are read from Redis and written through to the database.
+    # Only with a shared cache: deleting a Session row (terminating it)
+    # must evict the cached copy for every worker, not just this one.
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # ---------------------------------------------------------------------
 # AUTHENTICATION
 # ---------------------------------------------------------------------
@@ -169,6 +268,14 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Argon2 for new hashes; existing PBKDF2 hashes still verify and are
+# upgraded to Argon2 on the user's next successful login
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
 # ---------------------------------------------------------------------
 # INTERNATIONALIZATION
 # ---------------------------------------------------------------------
@@ -180,15 +287,32 @@ USE_TZ = True
 # ---------------------------------------------------------------------
 # STATIC & MEDIA FILES
 # ---------------------------------------------------------------------
-STATIC_URL = "/static/"
+# Optional CDN origin (e.g. https://d123.cloudfront.net) that pulls from this
+# app's /static/; {% static %} then points browsers at the CDN
+STATIC_HOST = os.environ.get("STATIC_HOST", "")
+STATIC_URL = STATIC_HOST + "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"  # For collectstatic
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-# WhiteNoise for serving static files in production
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# WhiteNoise for serving static files in production. collectstatic writes
+# hashed names plus .gz and (with brotli installed) .br copies; hashed files
+# are served with a one-year immutable Cache-Control. Development and tests
+# run without collectstatic, so they keep the plain storage.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
 
 # ---------------------------------------------------------------------
 # DJANGO CRISPY FORMS
@@ -205,7 +329,6 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
     ],
 }
 
@@ -218,8 +341,6 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # M-PESA DARAJA API SETTINGS
 # ---------------------------------------------------------------------
 # Get from environment variables in production
-import os
-
 MPESA_CONSUMER_KEY = os.environ.get("MPESA_CONSUMER_KEY", "")
 MPESA_CONSUMER_SECRET = os.environ.get("MPESA_CONSUMER_SECRET", "")
 MPESA_SHORTCODE = os.environ.get("MPESA_SHORTCODE", "")
@@ -242,11 +363,7 @@ ADMIN_FIRST_NAME = os.environ.get("DJANGO_SUPERUSER_FIRST_NAME", "")
 ADMIN_LAST_NAME = os.environ.get("DJANGO_SUPERUSER_LAST_NAME", "")
 
 # When True, Django will refuse to start if there is no superuser and DJANGO_SUPERUSER_EMAIL/DJANGO_SUPERUSER_PASSWORD are not provided.
-REQUIRE_SUPERUSER = os.environ.get("REQUIRE_SUPERUSER", "False").lower() in (
-    "1",
-    "true",
-    "yes",
-)
+REQUIRE_SUPERUSER = _bool_env("REQUIRE_SUPERUSER", "False")
 
 # Enforce requirement at startup to fail early in production if configured
 if REQUIRE_SUPERUSER:
@@ -260,28 +377,18 @@ if REQUIRE_SUPERUSER:
 # ---------------------------------------------------------------------
 # EMAIL CONFIGURATION
 # ---------------------------------------------------------------------
-# Email backend settings - can be overridden by environment variables or database settings
-def get_email_setting(key, default):
-    """Get email setting from database if available, otherwise from environment or default"""
-    try:
-        from settings_manager.models import SystemSetting
-        setting = SystemSetting.objects.filter(key=key, is_active=True).first()
-        if setting:
-            return setting.get_typed_value()
-    except:
-        pass
-    return os.environ.get(key, default)
-
-EMAIL_BACKEND = get_email_setting(
+# Email backend settings come from environment variables. Settings load
+# before the app registry, so SystemSetting rows cannot be consulted here.
+EMAIL_BACKEND = os.environ.get(
     "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
 )
-EMAIL_HOST = get_email_setting("EMAIL_HOST", "smtp.gmail.com")
-EMAIL_PORT = get_email_setting("EMAIL_PORT", 587)
-EMAIL_USE_TLS = get_email_setting("EMAIL_USE_TLS", True)
-EMAIL_USE_SSL = get_email_setting("EMAIL_USE_SSL", False)
-EMAIL_HOST_USER = get_email_setting("EMAIL_HOST_USER", "")
-EMAIL_HOST_PASSWORD = get_email_setting("EMAIL_HOST_PASSWORD", "")
-DEFAULT_FROM_EMAIL = get_email_setting("DEFAULT_FROM_EMAIL", "noreply@pettycash.local")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "587"))
+EMAIL_USE_TLS = _bool_env("EMAIL_USE_TLS", "True")
+EMAIL_USE_SSL = _bool_env("EMAIL_USE_SSL", "False")
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "noreply@pettycash.local")
 
 # Email timeout settings
-EMAIL_TIMEOUT = get_email_setting("EMAIL_TIMEOUT", 30)
+EMAIL_TIMEOUT = int(os.environ.get("EMAIL_TIMEOUT", "30"))
@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pettycash_system.settings")
 
 application = get_wsgi_application()
+
+# Import every URLconf and view module and build the resolver now, at worker
+# boot, instead of during the first request each worker serves (~0.8s)
+reverse("dashboard")
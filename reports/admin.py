@@ -10,6 +10,9 @@ from organization.models import Branch, Company, CostCenter, Department
 
 from .models import BudgetAllocation, Report
 
+# Rows sent per INSERT/UPDATE statement by the CSV import
+IMPORT_BATCH_SIZE = 500
+
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
@@ -70,6 +73,99 @@ class BudgetAllocationAdmin(admin.ModelAdmin):
 
     export_selected_to_csv.short_description = "Export selected to CSV"
 
+    def import_rows(self, rows):
+        """
+        Create or update one allocation per CSV row in a fixed number of
+        queries: referenced ids and existing allocations are loaded up front,
+        then written back with batched bulk_create/bulk_update. Unknown
+        branch, department and cost center ids are stored as blank; an
+        unknown company, or a row matching several existing allocations,
+        fails the import. Returns (created, updated).
+        """
+
+        def optional_int(row, column):
+            return int(row[column]) if row.get(column) else None
+
+        def existing_ids(model, column):
+            ids = {optional_int(row, column) for row in rows} - {None}
+            return set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+
+        company_ids = existing_ids(Company, "company_id")
+        branch_ids = existing_ids(Branch, "branch_id")
+        department_ids = existing_ids(Department, "department_id")
+        cost_center_ids = existing_ids(CostCenter, "cost_center_id")
+
+        parsed = []
+        for row_num, row in enumerate(rows, start=2):
+            company_id = int(row["company_id"])
+            if company_id not in company_ids:
+                raise Company.DoesNotExist(f"Company {company_id} does not exist")
+            branch_id = optional_int(row, "branch_id")
+            department_id = optional_int(row, "department_id")
+            cost_center_id = optional_int(row, "cost_center_id")
+            key = (
+                company_id,
+                branch_id if branch_id in branch_ids else None,
+                department_id if department_id in department_ids else None,
+                cost_center_id if cost_center_id in cost_center_ids else None,
+                int(row["year"]),
+                optional_int(row, "month"),
+            )
+            parsed.append((row_num, key, Decimal(row["amount"])))
+
+        # NULL scope columns escape the unique constraint, so one scope may
+        # already have several allocations; such rows cannot be updated
+        allocations, duplicates = {}, set()
+        for obj in BudgetAllocation.objects.filter(
+            company_id__in=company_ids, year__in={key[4] for _, key, _ in parsed}
+        ):
+            key = (
+                obj.company_id,
+                obj.branch_id,
+                obj.department_id,
+                obj.cost_center_id,
+                obj.year,
+                obj.month,
+            )
+            if key in allocations:
+                duplicates.add(key)
+            allocations[key] = obj
+
+        to_create, to_update, updated = [], {}, 0
+        for row_num, key, amount in parsed:
+            if key in duplicates:
+                raise BudgetAllocation.MultipleObjectsReturned(
+                    f"Row {row_num} matches several existing allocations"
+                )
+            obj = allocations.get(key)
+            if obj is None:
+                company_id, branch_id, department_id, cost_center_id, year, month = key
+                obj = allocations[key] = BudgetAllocation(
+                    company_id=company_id,
+                    branch_id=branch_id,
+                    department_id=department_id,
+                    cost_center_id=cost_center_id,
+                    year=year,
+                    month=month,
+                    amount=amount,
+                )
+                to_create.append(obj)
+                continue
+            # Later rows for the same scope and period overwrite earlier ones
+            obj.amount = amount
+            if obj.pk:
+                to_update[obj.pk] = obj
+            updated += 1
+
+        with transaction.atomic():
+            BudgetAllocation.objects.bulk_create(
+                to_create, batch_size=IMPORT_BATCH_SIZE
+            )
+            BudgetAllocation.objects.bulk_update(
+                to_update.values(), ["amount"], batch_size=IMPORT_BATCH_SIZE
+            )
+        return len(to_create), updated
+
     def get_urls(self):
         urls = super().get_urls()
         custom = [
@@ -95,52 +191,13 @@ class BudgetAllocationAdmin(admin.ModelAdmin):
             csv_file = request.FILES["csv_file"]
             try:
                 decoded = csv_file.read().decode("utf-8").splitlines()
-                reader = csv.DictReader(decoded)
-                created, updated = 0, 0
-                for row in reader:
-                    company = (
-                        Company.objects.get(id=int(row["company_id"]))
-                        if row.get("company_id")
-                        else None
-                    )
-                    if not company:
-                        messages.error(request, "company_id is required per row")
-                        return HttpResponseRedirect(
-                            reverse("admin:reports_budgetallocation_changelist")
-                        )
-                    branch = (
-                        Branch.objects.filter(id=int(row["branch_id"])).first()
-                        if row.get("branch_id")
-                        else None
-                    )
-                    department = (
-                        Department.objects.filter(id=int(row["department_id"])).first()
-                        if row.get("department_id")
-                        else None
-                    )
-                    cost_center = (
-                        CostCenter.objects.filter(id=int(row["cost_center_id"])).first()
-                        if row.get("cost_center_id")
-                        else None
-                    )
-                    year = int(row["year"])
-                    month = int(row["month"]) if row.get("month") else None
-                    amount = Decimal(row["amount"])
-                    obj, was_created = BudgetAllocation.objects.get_or_create(
-                        company=company,
-                        branch=branch,
-                        department=department,
-                        cost_center=cost_center,
-                        year=year,
-                        month=month,
-                        defaults={"amount": amount},
+                rows = list(csv.DictReader(decoded))
+                if not all(row.get("company_id") for row in rows):
+                    messages.error(request, "company_id is required per row")
+                    return HttpResponseRedirect(
+                        reverse("admin:reports_budgetallocation_changelist")
                     )
-                    if was_created:
-                        created += 1
-                    else:
-                        obj.amount = amount
-                        obj.save(update_fields=["amount"])
-                        updated += 1
+                created, updated = self.import_rows(rows)
             except Exception as e:
                 messages.error(request, f"Import failed: {e}")
                 return HttpResponseRedirect(
@@ -1,3 +1,94 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.admin.sites import AdminSite
+from django.db import DatabaseError
 from django.test import TestCase
 
-# Create your tests here.
+from organization.models import Branch, Company, Region
+
+from .admin import BudgetAllocationAdmin
+from .models import BudgetAllocation
+
+
+class BudgetAllocationImportTests(TestCase):
+    """Test the admin CSV import"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", code="ACME")
+        region = Region.objects.create(name="Coast", code="CST", company=self.company)
+        self.branch = Branch.objects.create(name="Mombasa", code="MSA", region=region)
+        self.admin = BudgetAllocationAdmin(BudgetAllocation, AdminSite())
+
+    def row(self, month, amount, branch_id=""):
+        return {
+            "company_id": str(self.company.id),
+            "branch_id": str(branch_id),
+            "department_id": "",
+            "cost_center_id": "",
+            "year": "2025",
+            "month": str(month),
+            "amount": amount,
+        }
+
+    def test_rows_are_created_and_updated_in_batches(self):
+        existing = BudgetAllocation.objects.create(
+            company=self.company, year=2025, month=1, amount=Decimal("10")
+        )
+        rows = [self.row(1, "100")]
+        rows += [self.row(month, "50", self.branch.id) for month in range(1, 13)]
+        rows += [self.row(2, "75"), self.row(2, "80"), self.row(3, "1", 999)]
+        # Company and branch ids, existing allocations, then one INSERT and one
+        # UPDATE inside a savepoint
+        with self.assertNumQueries(7):
+            created, updated = self.admin.import_rows(rows)
+
+        self.assertEqual((created, updated), (14, 2))
+        existing.refresh_from_db()
+        self.assertEqual(existing.amount, Decimal("100"))
+        self.assertEqual(
+            BudgetAllocation.objects.get(branch=None, month=2).amount, Decimal("80")
+        )
+        # An unknown branch id is stored as company-wide
+        self.assertTrue(BudgetAllocation.objects.filter(branch=None, month=3).exists())
+        self.assertEqual(
+            BudgetAllocation.objects.filter(branch=self.branch).count(), 12
+        )
+
+    def test_unknown_company_fails_the_import(self):
+        row = self.row(1, "100")
+        row["company_id"] = "999"
+        with self.assertRaises(Company.DoesNotExist):
+            self.admin.import_rows([row])
+        self.assertFalse(BudgetAllocation.objects.exists())
+
+    def test_failed_update_rolls_back_created_rows(self):
+        BudgetAllocation.objects.create(
+            company=self.company, year=2025, month=1, amount=Decimal("10")
+        )
+        rows = [self.row(1, "100"), self.row(2, "50")]
+        with mock.patch.object(
+            BudgetAllocation.objects, "bulk_update", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self.admin.import_rows(rows)
+        self.assertEqual(BudgetAllocation.objects.count(), 1)
+        self.assertEqual(BudgetAllocation.objects.get().amount, Decimal("10"))
+
+    def test_row_matching_duplicate_allocations_fails_the_import(self):
+        # branch, department and cost center are NULL, so the unique
+        # constraint lets the same company-wide scope be stored twice
+        for amount in ("10", "20"):
+            BudgetAllocation.objects.create(
+                company=self.company, year=2025, month=1, amount=Decimal(amount)
+            )
+        rows = [self.row(2, "50"), self.row(1, "100")]
+        with self.assertRaisesMessage(
+            BudgetAllocation.MultipleObjectsReturned,
+            "Row 3 matches several existing allocations",
+        ):
+            self.admin.import_rows(rows)
+        self.assertEqual(
+            sorted(BudgetAllocation.objects.values_list("amount", flat=True)),
+            [Decimal("10"), Decimal("20")],
+        )
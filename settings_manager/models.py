@@ -1,4 +1,5 @@
 import json
+import time
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -208,6 +209,11 @@ class ActivityLog(models.Model):
         )
 
 
+# Cached in place of a value when a key has no active setting, so misses are
+# cached without storing one caller's default for everyone else
+_MISSING = "__system_setting_missing__"
+
+
 # Utility function to get setting value
 def get_setting(key, default=None):
     """
@@ -222,16 +228,36 @@ def get_setting(key, default=None):
     cached_value = cache.get(cache_key)
 
     if cached_value is not None:
-        return cached_value
+        return default if cached_value == _MISSING else cached_value
 
     try:
         setting = SystemSetting.objects.get(key=key, is_active=True)
         value = setting.get_typed_value()
-        # Cache for 5 minutes
-        cache.set(cache_key, value, 300)
-        return value
     except SystemSetting.DoesNotExist:
-        # Cache the default value too
-        if default is not None:
-            cache.set(cache_key, default, 300)
-        return default
+        value = _MISSING
+    # Cache for 5 minutes
+    cache.set(cache_key, value, 300)
+    return default if value == _MISSING else value
+
+
+# Per-process copy of hot-path settings: {key: (expires_at, value)}
+_process_settings = {}
+
+
+def get_cached_setting(key, default=None, ttl=30):
+    """
+    get_setting() memoised in process memory for `ttl` seconds.
+    Meant for middleware that reads the same settings on every request;
+    other processes pick up changes once their copy expires.
+    """
+    now = time.monotonic()
+    entry = _process_settings.get(key)
+    if entry is None or entry[0] <= now:
+        entry = (now + ttl, get_setting(key, _MISSING))
+        _process_settings[key] = entry
+    return default if entry[1] == _MISSING else entry[1]
+
+
+def is_enabled(value):
+    """Interpret a boolean setting stored either as bool or as a string"""
+    return str(value).lower() in ("true", "1", "yes")
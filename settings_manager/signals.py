@@ -3,11 +3,21 @@ Signals for settings_manager app
 Clear cache when settings are modified
 """
 
+import itertools
+import logging
+import os
+
 from django.core.cache import cache
+from django.db.backends.signals import connection_created
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import SystemSetting
+from .models import SystemSetting, _process_settings
+
+logger = logging.getLogger(__name__)
+
+# Connections opened by this process; steady growth means churn
+_connections_opened = itertools.count(1)
 
 
 @receiver(post_save, sender=SystemSetting)
@@ -15,6 +25,7 @@ def clear_setting_cache_on_save(sender, instance, **kwargs):
     """Clear cache when a setting is saved"""
     cache_key = f"system_setting:{instance.key}"
     cache.delete(cache_key)
+    _process_settings.pop(instance.key, None)
 
 
 @receiver(post_delete, sender=SystemSetting)
@@ -22,3 +33,15 @@ def clear_setting_cache_on_delete(sender, instance, **kwargs):
     """Clear cache when a setting is deleted"""
     cache_key = f"system_setting:{instance.key}"
     cache.delete(cache_key)
+    _process_settings.pop(instance.key, None)
+
+
+@receiver(connection_created)
+def log_connection_created(sender, connection, **kwargs):
+    """Log each new database connection so reconnect churn is visible"""
+    logger.info(
+        "Opened database connection #%d (alias=%s, pid=%d)",
+        next(_connections_opened),
+        connection.alias,
+        os.getpid(),
+    )
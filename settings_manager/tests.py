@@ -1,3 +1,42 @@
+"""
+Tests for cached system setting lookups
+"""
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from settings_manager.models import (
+    SystemSetting,
+    _process_settings,
+    get_cached_setting,
+    get_setting,
+)
+
+
+class GetSettingTests(TestCase):
+    """Test get_setting() caching"""
+
+    def setUp(self):
+        cache.clear()
+        _process_settings.clear()
+        self.addCleanup(_process_settings.clear)
+
+    def test_value_is_typed_and_cached(self):
+        SystemSetting.objects.create(
+            key="MAX_LOGIN_ATTEMPTS",
+            display_name="Max Login Attempts",
+            category="security",
+            setting_type="integer",
+            value="5",
+        )
+        self.assertEqual(get_setting("MAX_LOGIN_ATTEMPTS"), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_setting("MAX_LOGIN_ATTEMPTS"), 5)
+
+    def test_missing_key_is_cached_without_the_callers_default(self):
+        self.assertEqual(get_setting("NOT_A_SETTING", 10), 10)
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_setting("NOT_A_SETTING"))
+            self.assertEqual(get_setting("NOT_A_SETTING", 20), 20)
+            self.assertEqual(get_cached_setting("NOT_A_SETTING", "x"), "x")
+            self.assertEqual(get_cached_setting("NOT_A_SETTING", "y"), "y")
@@ -6,7 +6,11 @@ class SystemMaintenanceConfig(AppConfig):
     name = "system_maintenance"
 
     def ready(self):
-        """Import signals when app is ready, but skip during migrations"""
+        """Import signals when app is ready, but skip backups during migrations"""
+        # The cached maintenance flag is only cleared by these receivers, so
+        # they are connected even if the database is unreachable at boot
+        import system_maintenance.cache_signals  # noqa
+
         try:
             from django.db import connection
             # Check if migrations table exists
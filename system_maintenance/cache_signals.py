@@ -0,0 +1,17 @@
+"""
+Signals keeping the cached maintenance flag current.
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import MAINTENANCE_CACHE_KEY, MaintenanceMode, _process_maintenance
+
+
+@receiver(post_save, sender=MaintenanceMode)
+@receiver(post_delete, sender=MaintenanceMode)
+def clear_maintenance_cache(sender, instance, **kwargs):
+    """Clear the cached maintenance flag read by the middleware"""
+    cache.delete(MAINTENANCE_CACHE_KEY)
+    _process_maintenance.pop(MAINTENANCE_CACHE_KEY, None)
@@ -1,11 +1,20 @@
 import json
 import os
+import time
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import FileExtensionValidator
 from django.db import models
 from django.utils import timezone
 
+MAINTENANCE_CACHE_KEY = "maintenance_mode_active"
+
+# Per-process copy of the flag so most requests skip even the cache lookup:
+# {MAINTENANCE_CACHE_KEY: (expires_at, active)}
+MAINTENANCE_PROCESS_TTL = 5
+_process_maintenance = {}
+
 
 class BackupRecord(models.Model):
     """
@@ -245,12 +254,22 @@ class MaintenanceMode(models.Model):
 
     @classmethod
     def is_maintenance_active(cls):
-        """Check if maintenance mode is currently active"""
-        try:
-            latest = cls.objects.latest()
-            return latest.is_active
-        except cls.DoesNotExist:
-            return False
+        """Check if maintenance mode is currently active (cached)"""
+        now = time.monotonic()
+        entry = _process_maintenance.get(MAINTENANCE_CACHE_KEY)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        active = cache.get(MAINTENANCE_CACHE_KEY)
+        if active is None:
+            latest = cls.objects.order_by("-activated_at").values("is_active").first()
+            active = bool(latest and latest["is_active"])
+            cache.set(MAINTENANCE_CACHE_KEY, active, 300)
+        _process_maintenance[MAINTENANCE_CACHE_KEY] = (
+            now + MAINTENANCE_PROCESS_TTL,
+            active,
+        )
+        return active
 
     def activate(self, user, reason, duration_minutes=None, backup=None):
         """Activate maintenance mode"""
@@ -1,3 +1,49 @@
-from django.test import TestCase
+"""
+Tests for maintenance mode middleware
+"""
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from system_maintenance.middleware import MaintenanceModeMiddleware
+from system_maintenance.models import MaintenanceMode, _process_maintenance
+
+
+class MaintenanceModeMiddlewareTests(TestCase):
+    """Test maintenance mode blocking"""
+
+    def setUp(self):
+        cache.clear()
+        _process_maintenance.clear()
+        self.addCleanup(_process_maintenance.clear)
+        self.middleware = MaintenanceModeMiddleware(lambda request: HttpResponse("ok"))
+
+    def call(self, path="/dashboard/"):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        return self.middleware(request)
+
+    def test_inactive_flag_is_cached(self):
+        self.assertEqual(self.call().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.call().status_code, 200)
+
+    def test_active_maintenance_blocks_non_admin_paths(self):
+        MaintenanceMode.objects.create(is_active=True, reason="Upgrade")
+        cache.clear()
+        _process_maintenance.clear()
+        self.assertEqual(self.call().status_code, 503)
+        self.assertEqual(self.call("/admin/").status_code, 200)
+
+    def test_process_copy_skips_the_shared_cache(self):
+        self.call()
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.call().status_code, 200)
+
+    def test_saving_maintenance_mode_clears_the_cached_flag(self):
+        self.assertEqual(self.call().status_code, 200)
+        MaintenanceMode.objects.create(is_active=True, reason="Upgrade")
+        self.assertEqual(self.call().status_code, 503)
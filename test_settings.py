@@ -2,10 +2,14 @@
 Test settings for running Phase 4 tests with SQLite.
 """
 
+import os
+
+# Tests run with development settings (no SSL redirect, plain static storage)
+os.environ.setdefault("DEBUG", "True")
+
 from pettycash_system.settings import *
 
 # Use DATABASE_URL (Postgres) in CI when available, otherwise fall back to an in-memory SQLite DB
-import os
 import dj_database_url
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
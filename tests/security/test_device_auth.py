@@ -0,0 +1,132 @@
+"""
+Device Authentication Middleware Security Tests
+
+Tests device identification and whitelist enforcement.
+"""
+
+from datetime import timedelta
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from accounts.models import User
+from accounts.models_device import DeviceAccessAttempt, WhitelistedDevice
+from pettycash_system.device_auth_middleware import (
+    DeviceAuthenticationMiddleware,
+    get_device_info,
+)
+from settings_manager.models import SystemSetting, _process_settings
+
+CHROME_WINDOWS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+EDGE_WINDOWS = CHROME_WINDOWS + " Edg/120.0.0.0"
+SAFARI_IPHONE = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+)
+CHROME_ANDROID = (
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36"
+)
+FIREFOX_LINUX = "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0"
+
+
+class DeviceInfoTests(SimpleTestCase):
+    """Test user agent classification"""
+
+    def device_name(self, user_agent):
+        request = RequestFactory().get("/", HTTP_USER_AGENT=user_agent)
+        return get_device_info(request)["device_name"]
+
+    def test_desktop_browsers(self):
+        self.assertEqual(self.device_name(CHROME_WINDOWS), "Windows 10/11 - Chrome")
+        self.assertEqual(self.device_name(EDGE_WINDOWS), "Windows 10/11 - Edge")
+        self.assertEqual(self.device_name(FIREFOX_LINUX), "Linux - Firefox")
+
+    def test_mobile_devices(self):
+        self.assertEqual(self.device_name(SAFARI_IPHONE), "iOS - Safari")
+        self.assertEqual(self.device_name(CHROME_ANDROID), "Android - Chrome")
+
+    def test_unknown_user_agent(self):
+        self.assertEqual(self.device_name(""), "Unknown Device")
+
+
+class DeviceAuthenticationMiddlewareTests(TestCase):
+    """Test device whitelist enforcement"""
+
+    def setUp(self):
+        cache.clear()
+        _process_settings.clear()
+        # Settings created here are cached; don't leak them into later tests
+        self.addCleanup(cache.clear)
+        self.addCleanup(_process_settings.clear)
+        for key, value in [
+            ("ENFORCE_DEVICE_WHITELIST", "true"),
+            ("ENABLE_ACTIVITY_GEOLOCATION", "false"),
+        ]:
+            SystemSetting.objects.create(
+                key=key,
+                display_name=key,
+                category="security",
+                setting_type="boolean",
+                value=value,
+            )
+        self.user = User.objects.create_user(username="staff", password="test123")
+        self.device = WhitelistedDevice.objects.create(
+            user=self.user,
+            device_name="Windows 10/11 - Chrome",
+            user_agent=CHROME_WINDOWS,
+            ip_address="10.0.0.1",
+        )
+        self.middleware = DeviceAuthenticationMiddleware(
+            lambda request: HttpResponse("ok")
+        )
+
+    def call(self, user_agent, path="/dashboard/"):
+        request = RequestFactory().get(
+            path, HTTP_USER_AGENT=user_agent, REMOTE_ADDR="10.0.0.1"
+        )
+        request.user = self.user
+        request.session = SessionStore()
+        return self.middleware(request)
+
+    def test_whitelisted_device_is_allowed_and_touched(self):
+        stale = timezone.now() - timedelta(days=1)
+        WhitelistedDevice.objects.filter(pk=self.device.pk).update(last_used_at=stale)
+        self.assertEqual(self.call(CHROME_WINDOWS).status_code, 200)
+        self.device.refresh_from_db()
+        self.assertGreater(self.device.last_used_at, stale)
+
+    def test_repeat_requests_skip_the_database(self):
+        self.call(CHROME_WINDOWS)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.call(CHROME_WINDOWS).status_code, 200)
+
+    def test_deactivated_device_is_blocked(self):
+        self.call(CHROME_WINDOWS)
+        self.device.deactivate()
+        self.assertEqual(self.call(CHROME_WINDOWS).status_code, 302)
+
+    def test_unknown_device_is_blocked_and_logged(self):
+        response = self.call(FIREFOX_LINUX)
+        self.assertRedirects(
+            response, reverse("accounts:device_blocked"), fetch_redirect_response=False
+        )
+        attempt = DeviceAccessAttempt.objects.get()
+        self.assertEqual(attempt.device_name, "Linux - Firefox")
+        self.assertFalse(attempt.was_allowed)
+
+    def test_exempt_urls_skip_the_check(self):
+        self.assertEqual(self.call(FIREFOX_LINUX, "/static/app.css").status_code, 200)
+
+    def test_exempt_urls_do_not_load_the_user(self):
+        request = RequestFactory().get("/accounts/login/")
+        request.user = SimpleLazyObject(lambda: self.fail("user was loaded"))
+        self.assertEqual(self.middleware(request).status_code, 200)
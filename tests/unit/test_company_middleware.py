@@ -0,0 +1,78 @@
+"""
+Unit Tests for CompanyMiddleware
+Tests that the request company context does not outlive its request
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from organization.models import Company
+from pettycash_system.middleware import (
+    CompanyMiddleware,
+    get_current_company,
+    get_current_company_id,
+    get_current_user,
+    set_current_company,
+)
+
+User = get_user_model()
+
+
+class CompanyMiddlewareTests(TestCase):
+    """Test CompanyMiddleware context handling"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Test Company", code="TC001")
+        self.user = User.objects.create_user(
+            username="clerk", password="test123", company=self.company
+        )
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def view(self, request):
+        self.seen.append(
+            (get_current_user(), get_current_company_id(), get_current_company())
+        )
+        return HttpResponse()
+
+    def get(self, user):
+        request = self.factory.get("/")
+        request.user = user
+        return CompanyMiddleware(self.view)(request)
+
+    def test_consecutive_requests_do_not_share_context(self):
+        self.get(self.user)
+        self.assertEqual(self.seen[0][:2], (self.user, self.company.id))
+        self.assertEqual(self.seen[0][2], self.company)
+        # Code running before the middleware on the next request sees nothing
+        self.assertIsNone(get_current_user())
+        self.assertIsNone(get_current_company_id())
+        self.assertIsNone(get_current_company())
+
+        self.get(AnonymousUser())
+        self.assertEqual(self.seen[1], (None, None, None))
+
+    def test_context_set_outside_a_request_is_restored(self):
+        set_current_company(self.company)
+        self.addCleanup(set_current_company, None)
+
+        self.get(AnonymousUser())
+        self.assertEqual(self.seen[0], (None, None, None))
+        self.assertEqual(get_current_company(), self.company)
+        self.assertEqual(get_current_company_id(), self.company.id)
+
+    def test_context_is_reset_when_the_view_raises(self):
+        request = self.factory.get("/")
+        request.user = self.user
+        middleware = CompanyMiddleware(self.view)
+        middleware.process_request(request)
+        self.assertEqual(get_current_user(), self.user)
+
+        middleware.process_exception(request, ValueError())
+        self.assertIsNone(get_current_user())
+        self.assertIsNone(get_current_company())
+        # process_response after process_exception is a no-op
+        middleware.process_response(request, HttpResponse())
+        self.assertIsNone(get_current_user())